@@ -1,3 +1,12 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from array import array
+from typing import Optional, Tuple
+from utils import RaggedRowsError, iter_int_rows
+
 def retrieve_list(url):
     try:
         import requests
@@ -38,6 +47,59 @@ def calculate_abs_diff(col1: list, col2: list):
 def weighted_sum(numbers: list, occurrences: dict) -> int:
     return sum(num * occurrences.get(num, 0) for num in numbers)
 
+def parse_columns_array(file_path: str, chunk_size: int = 1 << 18) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Parse both columns into int arrays, reading the file in chunks of whole lines.
+
+    Every chunk is stored as int32, widened to int64 if needed, as soon as it is parsed,
+    so 100M rows only need the final int32 columns plus a single chunk.
+    """
+    # array keeps the columns packed while reading, 'i' is the 4 byte C int
+    columns = (array('i'), array('i'))
+    for values, offsets in iter_int_rows(file_path, chunk_size=chunk_size):
+        if (np.diff(offsets) != 2).any():
+            raise RaggedRowsError(f"Every line of '{file_path}' must contain exactly two numbers")
+        if columns[0].typecode == 'i' and (int(values.min()) < -2**31 or int(values.max()) >= 2**31):
+            columns = tuple(array('q', np.frombuffer(column, dtype=np.int32).astype(np.int64).tobytes()) for column in columns)
+        pairs = values.reshape(-1, 2).astype(np.dtype(f'i{columns[0].itemsize}'))
+        for column, chunk in zip(columns, pairs.T):
+            column.frombytes(chunk.tobytes())
+    dtype = np.dtype(f'i{columns[0].itemsize}')
+    return np.frombuffer(columns[0], dtype=dtype), np.frombuffer(columns[1], dtype=dtype)
+
+def counting_sort(numbers: np.ndarray, counts: Optional[np.ndarray] = None) -> np.ndarray:
+    if counts is None:
+        counts = np.bincount(numbers)
+    return np.repeat(np.arange(counts.size, dtype=numbers.dtype), counts)
+
+def fits_counting_sort(col1: np.ndarray, col2: np.ndarray, counting_sort_limit: int) -> bool:
+    """Whether all IDs are valid np.bincount indices, i.e. non-negative and below counting_sort_limit."""
+    return min(int(col1.min(initial=0)), int(col2.min(initial=0))) >= 0 and max(int(col1.max(initial=0)), int(col2.max(initial=0))) < counting_sort_limit
+
+def total_distance(col1: np.ndarray, col2: np.ndarray, counting_sort_limit: int = 1 << 22) -> int:
+    """Sum of the distances of the sorted columns. Non-negative IDs below counting_sort_limit are sorted by counting."""
+    if fits_counting_sort(col1, col2, counting_sort_limit):
+        sorted1, sorted2 = counting_sort(col1), counting_sort(col2)
+    else:
+        sorted1, sorted2 = np.sort(col1), np.sort(col2)
+    return int(np.abs(sorted1.astype(np.int64) - sorted2).sum())
+
+def similarity_score(col1: np.ndarray, col2: np.ndarray, counting_sort_limit: int = 1 << 22) -> int:
+    """Sum of every number of the first column times its occurrences in the second column."""
+    if fits_counting_sort(col1, col2, counting_sort_limit):
+        occurrences = np.bincount(col2, minlength=int(col1.max(initial=0))+1)
+        return int((col1.astype(np.int64) * occurrences[col1]).sum())
+    values, counts = np.unique(col2, return_counts=True)
+    index = np.minimum(np.searchsorted(values, col1), values.size-1)
+    found = values[index] == col1
+    return int((col1[found].astype(np.int64) * counts[index[found]]).sum())
+
+def part1(filename: str) -> int:
+    return total_distance(*parse_columns_array(filename))
+
+def part2(filename: str) -> int:
+    return similarity_score(*parse_columns_array(filename))
+
 if __name__ == "__main__":
     # list = retrieve_list("https://adventofcode.com/2024/day/1/input")
     col1, col2 = parse_columns("Day1/input.txt")
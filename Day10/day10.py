@@ -1,5 +1,14 @@
-from typing import Set, Tuple, List
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timeit import timeit
+from typing import Dict, Set, Tuple, List
 import numpy as np
+from utils import load_char_grid, make_lookup_table
+
+# Digits are heights, every other character is impassable
+HEIGHT_LOOKUP = make_lookup_table({str(height): height for height in range(10)}, default=-1, dtype=np.int32)
 
 
 def parse_input(filename: str) -> np.ndarray:
@@ -12,10 +21,9 @@ def parse_input(filename: str) -> np.ndarray:
         filename (str): Path to the input file
 
     Returns:
-        list: 2D array (list of lists) containing the numbers
+        np.ndarray: 2D int32 array of the heights, -1 for impassable cells
     """
-    with open(filename, 'r') as file:
-        return np.array([[int(char) if char.isnumeric() else -1 for char in line.strip()] for line in file], dtype=np.int32)
+    return load_char_grid(filename, HEIGHT_LOOKUP)
 
 
 def get_trailhead_starts(top_map: np.ndarray) -> np.ndarray:
@@ -58,25 +66,156 @@ def traverse(top_map: np.ndarray,
     return valid_heads, visited
 
 
+def mark_uphill(top_map: np.ndarray, target_height: int = 9) -> np.ndarray:
+    """
+    Mark every cell that can be reached from a trailhead by only going up one level per step.
+
+    Returns:
+        np.ndarray: Boolean mask of the marked cells
+    """
+    frontier = top_map == 0
+    marked = frontier.copy()
+    for level in range(1, target_height+1):
+        near = np.zeros_like(frontier)
+        near[1:] |= frontier[:-1]
+        near[:-1] |= frontier[1:]
+        near[:, 1:] |= frontier[:, :-1]
+        near[:, :-1] |= frontier[:, 1:]
+        frontier = near & (top_map == level)
+        marked |= frontier
+    return marked
+
+def propagate_trails(top_map: np.ndarray, target_height: int = 9) -> Tuple[np.ndarray, Tuple[np.ndarray, np.ndarray]]:
+    """
+    Dynamic programming over the heights instead of a DFS per trailhead.
+
+    Starting at the peaks every cell with at least one trail passes its path count and
+    reachable peaks on to its neighbours one level lower, so each cell is processed once
+    for all trailheads. Cells that can not be reached from any trailhead (see mark_uphill)
+    are skipped.
+    A peak is at most target_height steps away, so the reachable peaks of a cell are stored
+    as a bitset over the (2*target_height+1)^2 window centred on the cell: one integer per
+    window row with one bit per column. Passing a bitset to a neighbour only shifts the window.
+
+    Args:
+        top_map (np.ndarray): Topographic map as returned by parse_input
+        target_height (int): Height of the peaks, at most 31
+
+    Returns:
+        Tuple[np.ndarray, Tuple[np.ndarray, np.ndarray]]: Number of distinct trails to a peak for every cell
+        on a trail from a trailhead and the flat indices of the trailheads with at least one trail
+        together with their peak bitsets of shape (trailheads, 2*target_height+1)
+    """
+    window = 2*target_height+1
+    if window > 64:
+        raise ValueError(f"Peak bitsets support a target height of at most 31, got {target_height}")
+    mask_type = np.uint32 if window <= 32 else np.uint64
+    height, width = top_map.shape
+    flat_map = np.where(mark_uphill(top_map, target_height), top_map, -1).ravel()
+    counts = np.zeros(flat_map.size, dtype=np.int64)
+    active = np.flatnonzero(flat_map == target_height)
+    counts[active] = 1
+    peaks = np.zeros((active.size, window), dtype=mask_type)
+    peaks[:, target_height] = mask_type(1) << mask_type(target_height)
+    for level in range(target_height-1, -1, -1):
+        rows, cols = np.divmod(active, width)
+        sources = []
+        targets = []
+        shifted_peaks = []
+        for offset, inside in ((-width, rows > 0), (width, rows < height-1), (-1, cols > 0), (1, cols < width-1)):
+            neighbours = active[inside] + offset
+            downhill = flat_map[neighbours] == level
+            sources.append(active[inside][downhill])
+            targets.append(neighbours[downhill])
+            # Peaks seen from the neighbour are offset by the step the other way
+            source_peaks = peaks[inside][downhill]
+            match offset:
+                case 1:
+                    shifted = source_peaks >> mask_type(1)
+                case -1:
+                    shifted = source_peaks << mask_type(1)
+                case _:
+                    shifted = np.zeros_like(source_peaks)
+                    if offset > 0:
+                        shifted[:, :-1] = source_peaks[:, 1:]
+                    else:
+                        shifted[:, 1:] = source_peaks[:, :-1]
+            shifted_peaks.append(shifted)
+        sources = np.concatenate(sources)
+        targets = np.concatenate(targets)
+        np.add.at(counts, targets, counts[sources])
+        # Union the bitsets of all sources per target
+        order = np.argsort(targets, kind='stable')
+        active, first = np.unique(targets[order], return_index=True)
+        peaks = np.bitwise_or.reduceat(np.concatenate(shifted_peaks)[order], first, axis=0) if active.size else np.zeros((0, window), dtype=mask_type)
+    return counts.reshape(top_map.shape), (active, peaks)
+
+def score_trailheads(top_map: np.ndarray, target_height: int = 9) -> Tuple[int, int]:
+    """
+    Returns:
+        Tuple[int, int]: Sum of the number of reachable peaks (part 1) and of the number of distinct trails (part 2) over all trailheads
+    """
+    counts, (_, peaks) = propagate_trails(top_map, target_height)
+    score = int(np.unpackbits(peaks.view(np.uint8)).sum())
+    rating = int(counts[top_map == 0].sum(dtype=np.int64))
+    return score, rating
+
+def count_trails_vectorized(top_maps: np.ndarray, target_height: int = 9) -> np.ndarray:
+    """
+    Count the distinct trails of all trailheads (part 2) with one array pass per height.
+
+    Starting with 1 for every peak, the trail counts of each lower height are the sum of the
+    counts of the four shifted neighbour arrays wherever the map has that height.
+
+    Args:
+        top_maps (np.ndarray): Single map of shape (H, W) or a stack of maps of shape (batch, H, W)
+        target_height (int): Height of the peaks
+
+    Returns:
+        np.ndarray: Sum of the trail counts over all trailheads, one per map (shape top_maps.shape[:-2])
+    """
+    layer = (top_maps == target_height).astype(np.int64)
+    for level in range(target_height-1, -1, -1):
+        summed = np.zeros_like(layer)
+        summed[..., 1:, :] += layer[..., :-1, :]
+        summed[..., :-1, :] += layer[..., 1:, :]
+        summed[..., :, 1:] += layer[..., :, :-1]
+        summed[..., :, :-1] += layer[..., :, 1:]
+        layer = np.where(top_maps == level, summed, 0)
+    return layer.sum(axis=(-2, -1))
+
+def benchmark_trail_counting(top_map: np.ndarray, repeat: int = 3) -> Dict[str, float]:
+    """
+    Compare the recursive traverse against count_trails_vectorized on the same map.
+
+    Returns:
+        Dict[str, float]: Best time in seconds per method out of repeat runs
+    """
+    trailheads = get_trailhead_starts(top_map)
+    methods = {
+        "traverse": lambda: sum(traverse(top_map, tuple(start), 0, set(), 9, True)[0] for start in trailheads),
+        "count_trails_vectorized": lambda: count_trails_vectorized(top_map),
+    }
+    return {name: min(timeit(method, number=1) for _ in range(repeat)) for name, method in methods.items()}
+
+def part1(filename: str) -> int:
+    return score_trailheads(parse_input(filename))[0]
+
+def part2(filename: str) -> int:
+    return score_trailheads(parse_input(filename))[1]
+
 if __name__ == "__main__":
     # top_map = parse_input("Day10/test.txt")
     # top_map = parse_input("Day10/test2.txt")
     # top_map = parse_input("Day10/test3.txt")
     # top_map = parse_input("Day10/test4.txt")
     # top_map = parse_input("Day10/test5.txt")
-    # top_map = parse_input("Day10/input.txt")
-    # trailheads = get_trailhead_starts(top_map)
-    # trailhead_values = [traverse(top_map, tuple(start), 0, set(), 9)[
-    #     0] for start in trailheads]
-    # score = sum(trailhead_values)
-    # print(score)
-    ### Finish Part 1 ###
     # top_map = parse_input("Day10/test6.txt")
     # top_map = parse_input("Day10/test7.txt")
     top_map = parse_input("Day10/input.txt")
-    trailheads = get_trailhead_starts(top_map)
-    trailhead_values = [traverse(top_map, tuple(start), 0, set(), 9, True)[
-        0] for start in trailheads]
-    score = sum(trailhead_values)
+    score, rating = score_trailheads(top_map)
     print(score)
-    a = 0
+    print(rating)
+    
+    for name, seconds in benchmark_trail_counting(top_map).items():
+        print(f"{name}: {seconds*1000:.3f}ms")
@@ -2,8 +2,9 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from typing import List
-from utils import read_rows_from_file
+from typing import List, Tuple
+import numpy as np
+from utils import read_int_ragged
 
 def check_all_records(records: List[List[int]]) -> int:
   valid_results = [check_record_safe(record) for record in records]
@@ -11,8 +12,7 @@ def check_all_records(records: List[List[int]]) -> int:
   return sum(valid_results)
 
 def check_all_modified_records(records: List[List[int]]) -> int:
-  modified_records = [create_modifications(record) for record in records]
-  valid_results = [any([check_record_safe(record) for record in modified]) for modified in modified_records]
+  valid_results = [check_record_safe_dampened(record) for record in records]
   
   return sum(valid_results)
 
@@ -23,6 +23,84 @@ def check_record_safe(record: List[int]) -> bool:
   
   return same_sign and small_enough_differences
 
+def check_record_safe_dampened(record: List[int]) -> bool:
+  """
+  Check if the record is safe after removing at most one level, in linear time.
+
+  For a fixed direction only the two levels of the first bad difference can be removed,
+  so both are tried on the differences directly instead of checking every modified copy.
+  """
+  record_diffs: List[int] = [j-i for i, j in zip(record[:-1], record[1:])]
+  return any(check_diffs_dampened(record_diffs, sign) for sign in (1, -1))
+
+def check_diffs_dampened(record_diffs: List[int], sign: int) -> bool:
+  def good(diff: int) -> bool:
+    return 1 <= sign*diff <= 3
+  def all_good(start: int) -> bool:
+    return all(good(record_diffs[k]) for k in range(start, len(record_diffs)))
+  def removal_safe(level: int) -> bool:
+    # Differences before the first bad one are already known to be good
+    if level == 0:
+      return all_good(1)
+    if level == len(record_diffs):
+      return True
+    # Removing an inner level merges the differences to its left and right
+    return good(record_diffs[level-1]+record_diffs[level]) and all_good(level+1)
+
+  first_bad = next((k for k, diff in enumerate(record_diffs) if not good(diff)), None)
+  if first_bad is None:
+    return True
+  return removal_safe(first_bad) or removal_safe(first_bad+1)
+
+def read_records_flat(filename: str) -> Tuple[np.ndarray, np.ndarray]:
+  """
+  Read all records into one flat array plus row offsets.
+
+  Returns:
+    Tuple[np.ndarray, np.ndarray]: Levels of all records and offsets so that record i is values[offsets[i]:offsets[i+1]]
+  """
+  return read_int_ragged(filename)
+
+def check_records_batch(values: np.ndarray, offsets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+  """
+  Check all records at once on the flat representation of read_records_flat.
+
+  The differences of all records are computed in one np.diff. The differences of record i
+  are diffs[offsets[i]:offsets[i+1]-1], the ones across record boundaries are never used.
+  The number of bad differences in any range is looked up from a cumulative sum, which also
+  locates the first bad difference of every record for the dampened check
+  (see check_record_safe_dampened).
+
+  Returns:
+    Tuple[np.ndarray, np.ndarray]: Boolean arrays whether each record is safe without and with the dampener
+  """
+  starts, ends = offsets[:-1], offsets[1:]
+  diff_ends = np.maximum(ends-1, starts)
+  diffs = np.diff(values)
+  safe = np.zeros(len(starts), dtype=bool)
+  safe_dampened = np.zeros(len(starts), dtype=bool)
+  for sign in (1, -1):
+    good = (sign*diffs >= 1) & (sign*diffs <= 3)
+    bad_cumsum = np.concatenate(([0], np.cumsum(~good)))
+    def num_bad(start: np.ndarray, stop: np.ndarray) -> np.ndarray:
+      return bad_cumsum[stop] - bad_cumsum[np.minimum(start, stop)]
+    record_bad = num_bad(starts, diff_ends)
+    safe |= record_bad == 0
+    safe_dampened |= record_bad == 0
+    # Index of the first bad difference of each record with at least one
+    has_bad = record_bad > 0
+    first_bad = np.where(has_bad, np.searchsorted(bad_cumsum, bad_cumsum[starts]+1, side='left') - 1, starts)
+    for removed in (first_bad, first_bad+1):
+      # Removing an inner level merges the differences to its left and right
+      inner = (removed > starts) & (removed < ends-1)
+      merge_at = np.clip(removed, 1, max(len(diffs)-1, 1))
+      merged = diffs[merge_at-1] + diffs[merge_at] if len(diffs) > 1 else np.zeros_like(removed)
+      merged_good = ~inner | ((sign*merged >= 1) & (sign*merged <= 3))
+      left_good = num_bad(starts, np.maximum(removed-1, starts)) == 0
+      right_good = num_bad(removed+1, diff_ends) == 0
+      safe_dampened |= has_bad & left_good & merged_good & right_good
+  return safe, safe_dampened
+
 def create_modifications(numbers: List[int]) -> List[List[int]]:
   result = []
   for i in range(len(numbers)):
@@ -31,7 +109,14 @@ def create_modifications(numbers: List[int]) -> List[List[int]]:
   result.append(numbers)
   return result
 
+def part1(filename: str) -> int:
+  return int(check_records_batch(*read_records_flat(filename))[0].sum())
+
+def part2(filename: str) -> int:
+  return int(check_records_batch(*read_records_flat(filename))[1].sum())
+
 if __name__ == "__main__":
-  records = read_rows_from_file("Day2/input.txt")  # Changed to relative path
-  print(check_all_records(records))
-  print(check_all_modified_records(records))
\ No newline at end of file
+  values, offsets = read_records_flat("Day2/input.txt")
+  safe, safe_dampened = check_records_batch(values, offsets)
+  print(safe.sum())
+  print(safe_dampened.sum())
\ No newline at end of file
@@ -1,11 +1,8 @@
-import sys
 import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from utils import read_file_to_string
+import mmap
 import re
-from typing import List, Callable
-from operator import mul, sub, add
+from multiprocessing import Pool
+from typing import Iterator, List, Callable, NamedTuple, Optional, Tuple, Union
 
 
 def extract_operations(input: str, pattern: re.Pattern) -> List[str]:
@@ -36,13 +33,163 @@ def apply_operation(mul_operations: List[str], func: Callable[[int, int],int]) -
         result += func(int(numbers[0]), int(numbers[1]))
     return result
 
+# mul(a,b) with both operands captured, do() and don't() in a single pattern
+OPERATION_PATTERN = re.compile(r"mul\((\d+),(\d+)\)|(do\(\))|(don't\(\))")
+# Unfinished operation at the very end of a chunk that may be completed by the next one
+PARTIAL_OPERATION_PATTERN = re.compile(r"(?:m(?:u(?:l(?:\((?:\d+(?:,\d*)?)?)?)?)?|d(?:o(?:\(|n(?:'(?:t\(?)?)?)?)?)\Z")
+
+def scan_operations_stream(filename: str, chunk_size: int = 1 << 20) -> Tuple[int, int]:
+    """
+    Scan the input chunk by chunk and sum the products of all and of the enabled mul operations.
+
+    An unfinished operation at the end of a chunk is carried over to the next one so matches
+    spanning chunk boundaries are found. Only one chunk is held in memory at a time.
+
+    Args:
+        filename (str): Path to the corrupted memory dump
+        chunk_size (int): Number of characters read at once
+
+    Returns:
+        Tuple[int, int]: Sum of all mul operations and sum of those enabled by do()/don't()
+    """
+    total = 0
+    enabled_total = 0
+    enabled = True
+    carry = ""
+    with open(filename, 'r') as file:
+        while True:
+            chunk = file.read(chunk_size)
+            buffer = carry + chunk
+            last_end = 0
+            for match in OPERATION_PATTERN.finditer(buffer):
+                num1, num2, enable, disable = match.groups()
+                if enable:
+                    enabled = True
+                elif disable:
+                    enabled = False
+                else:
+                    product = int(num1) * int(num2)
+                    total += product
+                    if enabled:
+                        enabled_total += product
+                last_end = match.end()
+            if not chunk:
+                return total, enabled_total
+            partial = PARTIAL_OPERATION_PATTERN.search(buffer, last_end)
+            carry = buffer[partial.start():] if partial else ""
+
+OPERATION_PATTERN_BYTES = re.compile(OPERATION_PATTERN.pattern.encode())
+
+class SegmentResult(NamedTuple):
+    """Sums of a segment of the input that does not know whether mul is enabled at its start."""
+    total: int
+    # Sum of the mul operations before the first do()/don't() of the segment
+    leading: int
+    # Sum of the enabled mul operations after the first do()/don't()
+    enabled: int
+    # Enabled state after the last do()/don't() or None if the segment has neither
+    final_state: Optional[bool]
+
+# Length of the longest operation with the usual operands of up to three digits (mul(999,999))
+MAX_OPERATION_LENGTH = 12
+
+def iter_segment_operations(buffer: Union[bytes, mmap.mmap], start: int, stop: int) -> Iterator[re.Match]:
+    """
+    Find all operations starting in buffer[start:stop], reading at most MAX_OPERATION_LENGTH bytes past stop.
+
+    An operation with longer operands that runs past this window can only start at the last
+    'mul(' before stop, so that single position is matched again without a bound.
+    """
+    window_end = min(len(buffer), stop + MAX_OPERATION_LENGTH)
+    last_end = start
+    for match in OPERATION_PATTERN_BYTES.finditer(buffer, start, window_end):
+        if match.start() >= stop:
+            return
+        yield match
+        last_end = match.end()
+    if window_end < len(buffer):
+        # The end bound applies to the whole needle which may itself straddle stop
+        tail = buffer.rfind(b"mul(", last_end, stop + 3)
+        match = OPERATION_PATTERN_BYTES.match(buffer, tail) if tail != -1 else None
+        if match:
+            yield match
+
+def scan_segment(buffer: Union[bytes, mmap.mmap], start: int, stop: int) -> SegmentResult:
+    """
+    Scan all operations starting in buffer[start:stop] with the bytes pattern, without decoding or copying.
+
+    Operations may extend past stop so every operation is found by exactly one segment.
+    """
+    total = 0
+    leading = 0
+    enabled_total = 0
+    state: Optional[bool] = None
+    for match in iter_segment_operations(buffer, start, stop):
+        num1, num2, enable, disable = match.groups()
+        if enable:
+            state = True
+        elif disable:
+            state = False
+        else:
+            product = int(num1) * int(num2)
+            total += product
+            if state is None:
+                leading += product
+            elif state:
+                enabled_total += product
+    return SegmentResult(total, leading, enabled_total, state)
+
+def merge_segments(results: List[SegmentResult]) -> Tuple[int, int]:
+    """Combine the segment results in input order, starting with mul enabled."""
+    total = 0
+    enabled_total = 0
+    enabled = True
+    for result in results:
+        total += result.total
+        enabled_total += result.enabled + (result.leading if enabled else 0)
+        if result.final_state is not None:
+            enabled = result.final_state
+    return total, enabled_total
+
+def _scan_file_segment(segment: Tuple[str, int, int]) -> SegmentResult:
+    filename, start, stop = segment
+    with open(filename, 'rb') as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return scan_segment(buffer, start, stop)
+
+def scan_operations_mmap(filename: str, workers: int = 1, num_segments: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Scan the memory-mapped input with the bytes pattern, optionally split over worker processes.
+
+    Each worker maps the file itself and scans one segment. The segments report their
+    enabled-state transitions (see SegmentResult) which are merged in order.
+
+    Args:
+        filename (str): Path to the corrupted memory dump
+        workers (int): Number of worker processes, 1 scans in the current process
+        num_segments (Optional[int]): Number of segments, defaults to the number of workers
+
+    Returns:
+        Tuple[int, int]: Sum of all mul operations and sum of those enabled by do()/don't()
+    """
+    size = os.path.getsize(filename)
+    if size == 0:
+        return 0, 0
+    if workers <= 1:
+        return merge_segments([_scan_file_segment((filename, 0, size))])
+    num_segments = num_segments or workers
+    bounds = [size * i // num_segments for i in range(num_segments+1)]
+    segments = [(filename, start, stop) for start, stop in zip(bounds[:-1], bounds[1:])]
+    with Pool(workers) as pool:
+        return merge_segments(pool.map(_scan_file_segment, segments))
+
+def part1(filename: str) -> int:
+    return scan_operations_mmap(filename)[0]
+
+def part2(filename: str) -> int:
+    return scan_operations_mmap(filename)[1]
+
 if __name__ == "__main__":
-    multiply_pattern = re.compile(r"mul\(\d+,\d+\)")
-    
-    input = read_file_to_string("Day3/input.txt")
-    mul_operations = extract_operations(input, multiply_pattern)
-    result = apply_operation(mul_operations, mul)
+    result, filtered_result = scan_operations_mmap("Day3/input.txt")
     print(result)
-    filtered_mul_operations = extract_operations_conditional(input, multiply_pattern, re.compile(r"do\(\)"), re.compile(r"don't\(\)"))
-    result = apply_operation(filtered_mul_operations, mul)
-    print(result)
\ No newline at end of file
+    print(filtered_result)
@@ -2,9 +2,9 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils import read_file_to_string, read_columns_from_file, read_rows_from_file
+from utils import read_file_to_string, read_columns_from_file, load_char_grid
 import re
-from typing import List, Callable
+from typing import Dict, List, Callable, Tuple
 import numpy as np
 
 def count_list_matches(pattern: re.Pattern, input_list: List[str]) -> int:
@@ -81,20 +81,114 @@ def check_diagonal_match(pattern: re.Pattern, diagonals: List[str]) -> bool:
             return False
     return True
 
+# Row and column steps for all 8 reading directions
+DIRECTIONS: List[Tuple[int, int]] = [(0, 1), (1, 0), (1, 1), (1, -1), (0, -1), (-1, 0), (-1, -1), (-1, 1)]
+
+def load_grid(filename: str) -> np.ndarray:
+    """
+    Load the puzzle once as a 2D uint8 array of the character codes, viewed on the memory-mapped file.
+    """
+    return load_char_grid(filename)
+
+def count_words(grid: np.ndarray, words: List[str]) -> Dict[str, int]:
+    """
+    Count the occurrences of every word in all 8 directions with shifted slices of the grid.
+
+    For a word of length L and a direction (dr, dc), letter k of the word is compared against
+    the grid shifted by k*(dr, dc) for all start positions at once. The comparison masks of
+    each letter are computed only once for all words and directions.
+
+    Args:
+        grid (np.ndarray): Grid as returned by load_grid
+        words (List[str]): Words to search for
+
+    Returns:
+        Dict[str, int]: Number of occurrences per word. Palindromes are found once per direction.
+    """
+    height, width = grid.shape
+    letter_masks = {letter: grid == ord(letter) for letter in set(''.join(words))}
+    counts = {}
+    for word in words:
+        span = len(word)-1
+        if span < 0 or span >= max(height, width):
+            counts[word] = 0
+            continue
+        directions = DIRECTIONS if span > 0 else DIRECTIONS[:1]
+        total = 0
+        for dr, dc in directions:
+            # Start positions for which the whole word stays inside the grid
+            rows = height - abs(dr)*span
+            cols = width - abs(dc)*span
+            if rows <= 0 or cols <= 0:
+                continue
+            row_start = span if dr < 0 else 0
+            col_start = span if dc < 0 else 0
+            matches = np.ones((rows, cols), dtype=bool)
+            for k, letter in enumerate(word):
+                r, c = row_start + k*dr, col_start + k*dc
+                matches &= letter_masks[letter][r:r+rows, c:c+cols]
+            total += int(matches.sum())
+        counts[word] = total
+    return counts
+
+def stencil_rotations(stencil: List[str]) -> List[List[str]]:
+    """
+    All distinct 90 degree rotations of a stencil given as rows of equal length.
+    """
+    rotations = []
+    current = np.array([list(row) for row in stencil])
+    for _ in range(4):
+        rows = [''.join(row) for row in current]
+        if rows not in rotations:
+            rotations.append(rows)
+        current = np.rot90(current)
+    return rotations
+
+def count_stencils(grid: np.ndarray, stencils: List[List[str]], wildcard: str = '.') -> int:
+    """
+    Count all positions where any of the stencils matches the grid.
+
+    Every stencil is a list of rows of equal length where the wildcard matches any letter.
+    Each letter of a stencil is checked with one boolean comparison over the whole grid,
+    shifted by its offset in the stencil. A position matched by several stencils is counted once.
+
+    Args:
+        grid (np.ndarray): Grid as returned by load_grid
+        stencils (List[List[str]]): Stencils to match, e.g. stencil_rotations(["M.S", ".A.", "M.S"]) for X-MAS
+        wildcard (str): Character in the stencils that matches anything
+
+    Returns:
+        int: Number of top-left positions at which at least one stencil matches
+    """
+    height, width = grid.shape
+    letter_masks = {letter: grid == ord(letter) for letter in set(''.join(''.join(st) for st in stencils)) - {wildcard}}
+    found = np.zeros_like(grid, dtype=bool)
+    for stencil in stencils:
+        rows = height - len(stencil) + 1
+        cols = width - len(stencil[0]) + 1
+        if rows <= 0 or cols <= 0:
+            continue
+        matches = np.ones((rows, cols), dtype=bool)
+        for r, row in enumerate(stencil):
+            for c, letter in enumerate(row):
+                if letter != wildcard:
+                    matches &= letter_masks[letter][r:r+rows, c:c+cols]
+        found[:rows, :cols] |= matches
+    return int(found.sum())
+
+X_MAS_STENCIL: List[str] = ["M.S",
+                             ".A.",
+                             "M.S"]
+
+def part1(filename: str) -> int:
+    return count_words(load_grid(filename), ["XMAS"])["XMAS"]
+
+def part2(filename: str) -> int:
+    return count_stencils(load_grid(filename), stencil_rotations(X_MAS_STENCIL))
+
 if __name__ == "__main__":
-    xmas_pattern = re.compile(r"(?=(XMAS|SAMX))")
-    mas_pattern = re.compile(r"(?=(MAS|SAM))")
-    row_input = [row[0] for row in read_rows_from_file("Day4/input.txt", str)] # Returns a list of lists for separated entries (but input is not separated)
-    col_input = transform_rows_to_columns(row_input)
-    diag_input = extract_diagonals_from_rows(row_input)
-    row_result = count_list_matches(xmas_pattern, row_input)
-    col_result = count_list_matches(xmas_pattern, col_input)
-    diag_result = count_list_matches(xmas_pattern, diag_input)
-    total_matches = row_result + col_result + diag_result
+    grid = load_grid("Day4/input.txt")
+    total_matches = count_words(grid, ["XMAS"])["XMAS"]
     print(total_matches)
     
-    row_input = [row[0] for row in read_rows_from_file("Day4/input.txt", str)] # Returns a list of lists for separated entries (but input is not separated)
-    chunks = split_into_chunks(row_input)
-    chunk_diagonals = [get_main_diagonals_from_chunk(chunk) for chunk in chunks]
-    chunk_results = [check_diagonal_match(mas_pattern, diagonals) for diagonals in chunk_diagonals]
-    print(sum(chunk_results))
\ No newline at end of file
+    print(count_stencils(grid, stencil_rotations(X_MAS_STENCIL)))
\ No newline at end of file
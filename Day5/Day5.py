@@ -1,19 +1,85 @@
+import heapq
 import numpy as np
-from typing import Dict, Set, List
+from array import array
+from typing import Dict, Iterator, Set, List, TextIO, Tuple
 from numpy.typing import NDArray
 
 def create_preconditions(rules: np.ndarray) -> Dict[int, Set[int]]:
-    pres = rules[:,0]
-    posts = rules[:,1]
-    preconditions = {(int)(pre):set([v for p, v in rules if p == pre]) for pre in pres}
+    # Single pass over the rules instead of rescanning all rules for every page
+    preconditions: Dict[int, Set[int]] = {}
+    for pre, post in rules.tolist():
+        preconditions.setdefault(pre, set()).add(post)
     return preconditions
 
-def check_valid(preconditions: Dict[int, Set[int]], order: np.ndarray):
-    items = []
-    for i, element in enumerate(order):
-        if preconditions.get(element, set()) & set(items):
+def create_rule_matrix(rules: np.ndarray, num_pages: int = 100) -> NDArray[np.bool_]:
+    """
+    Index the rules as a dense boolean matrix over the page ids.
+
+    Args:
+        rules (np.ndarray): Rules of shape (R, 2) where the first page has to come before the second
+        num_pages (int): Size of the page id space, extended if the rules contain larger ids
+
+    Returns:
+        NDArray[np.bool_]: Matrix where [a, b] is True if page a must come before page b
+    """
+    num_pages = max(num_pages, int(rules.max())+1) if rules.size else num_pages
+    matrix = np.zeros((num_pages, num_pages), dtype=bool)
+    matrix[rules[:, 0], rules[:, 1]] = True
+    return matrix
+
+def must_precede(matrix: NDArray[np.bool_], a: int, b: int) -> bool:
+    return bool(matrix[a, b])
+
+def rule_matrix_path(path: str) -> str:
+    # np.save appends .npy to paths without it while np.load does not, so both use the full name
+    return path if path.endswith('.npy') else path + '.npy'
+
+def save_rule_matrix(path: str, matrix: NDArray[np.bool_]) -> None:
+    np.save(rule_matrix_path(path), matrix)
+
+def load_rule_matrix(path: str) -> NDArray[np.bool_]:
+    return np.load(rule_matrix_path(path)).astype(bool)
+
+def check_valid_batch(matrix: NDArray[np.bool_], orders: List[np.ndarray], chunk_size: int = 1024) -> NDArray[np.bool_]:
+    """
+    Check many updates at once by looking up the rules for every pair of pages of every update.
+
+    An update is invalid if some page is followed by a page that must come before it.
+    The updates are padded to the same length and processed in chunks to bound the memory
+    of the (chunk, length, length) pair lookups. Pages outside the matrix are not mentioned
+    by any rule and thus unconstrained, so they are masked like the padding.
+
+    Returns:
+        NDArray[np.bool_]: True for every valid update
+    """
+    valid = np.ones(len(orders), dtype=bool)
+    for start in range(0, len(orders), chunk_size):
+        chunk = orders[start:start+chunk_size]
+        length = max((o.size for o in chunk), default=0)
+        pages = np.full((len(chunk), length), -1, dtype=np.int64)
+        for i, o in enumerate(chunk):
+            pages[i, :o.size] = o
+        present = (pages >= 0) & (pages < matrix.shape[0])
+        pages = np.where(present, pages, 0)
+        # broken[u, i, j]: the later page j must come before the earlier page i
+        broken = matrix[pages[:, None, :], pages[:, :, None]]
+        broken &= np.triu(np.ones((length, length), dtype=bool), k=1)
+        broken &= present[:, :, None] & present[:, None, :]
+        valid[start:start+len(chunk)] = ~broken.any(axis=(1, 2))
+    return valid
+
+def check_valid(preconditions: Dict[int, Set[int]], order: np.ndarray) -> bool:
+    """
+    Check that no page is preceded by a page that has to come after it.
+
+    Single pass over the pages growing the set of previous pages instead of rebuilding it for every page.
+    """
+    previous: Set[int] = set()
+    for page in order.tolist():
+        successors = preconditions.get(page)
+        if successors and not successors.isdisjoint(previous):
             return False
-        items.append(element)
+        previous.add(page)
     return True
 
 def get_correct_orders_center_sum(preconditions: Dict[int, Set[int]], orders: List[np.ndarray]) -> int:
@@ -26,48 +92,112 @@ def get_correct_orders_center_sum(preconditions: Dict[int, Set[int]], orders: Li
     return center_sum
     
 def fix_order(preconditions: Dict[int, Set[int]], order: np.ndarray) -> np.ndarray:
-    fixed_order = order
-    items = []
-    i = 0
-    while i < order.size:
-        element = fixed_order[i]
-        broken_conditions = preconditions.get(element, set()) & set(items)
-        items.append(element)
-        if broken_conditions:
-            for j, subelement in enumerate(fixed_order[:i]):
-                if subelement in broken_conditions:
-                    print(fixed_order[:j], element , np.delete(fixed_order[j:], np.argwhere(fixed_order[j:]==element)))
-                    fixed_order = np.concatenate([fixed_order[:j],[element] , np.delete(fixed_order[j:], np.argwhere(fixed_order[j:]==element))])
-                    i = 0
-                    items = []
-                    break
-        else:
-            i+=1
-    return fixed_order
+    """
+    Reorder the pages with Kahn's topological sort on the rules between the pages of the update.
+
+    Pages without constraints between them keep their original relative order.
+    If the rules fully order the pages of the update they are sorted by the number of later pages instead.
+
+    Raises:
+        ValueError: If the rules between the pages contain a cycle
+    """
+    pages = order.tolist()
+    positions = {page: i for i, page in enumerate(pages)}
+    # If the rules order every pair of pages the number of later pages is distinct for every page
+    # and sorting by it directly yields the topological order
+    num_later = [len(preconditions.get(page, set()).intersection(positions)) for page in pages]
+    if len(set(num_later)) == len(pages):
+        sorted_order = np.array([page for _, page in sorted(zip(num_later, pages), reverse=True)], dtype=order.dtype)
+        if check_valid(preconditions, sorted_order):
+            return sorted_order
+    successors = [[positions[s] for s in preconditions.get(page, ()) if s in positions] for page in pages]
+    in_degree = [0]*len(pages)
+    for targets in successors:
+        for target in targets:
+            in_degree[target] += 1
+    # Heap of original positions so ties are resolved in the original order
+    ready = [i for i, degree in enumerate(in_degree) if degree == 0]
+    heapq.heapify(ready)
+    fixed_order = []
+    while ready:
+        i = heapq.heappop(ready)
+        fixed_order.append(pages[i])
+        for target in successors[i]:
+            in_degree[target] -= 1
+            if in_degree[target] == 0:
+                heapq.heappush(ready, target)
+    if len(fixed_order) != len(pages):
+        raise ValueError(f"Rules for the pages {pages} contain a cycle")
+    return np.array(fixed_order, dtype=order.dtype)
                     
                     
-if __name__=='__main__':
-    with open("Day5/input.txt", "r") as f:
-        da = np.array(f.read().splitlines())
+def read_rules(file: TextIO) -> NDArray[np.int_]:
+    """
+    Read the rules line by line up to the blank line separating them from the updates.
 
-    split_index = np.where(da=='')[0][0]
-    rules,_, order = np.array_split(da, [split_index,split_index+1])
-    
-    rules = np.array([[(int)(n) for n in rule.split('|')] for rule in rules])
-    
-    preconditions = create_preconditions(rules)
-    
-    orders = [np.array(o.split(','), dtype=int) for o in order]    
-    center_sum = get_correct_orders_center_sum(preconditions, orders)
-    print(center_sum)
-    
-    fixed = fix_order(preconditions, orders[3])
-    print(fixed)
-    fixed_orders = [fix_order(preconditions, o) for o in orders if not check_valid(preconditions, o)]
-    print(sum(o[o.size//2] for o in fixed_orders))
-    
-    #print([check_valid(preconditions, o) for o in orders])
-    
-    #print(preconditions)
-    #print(order)
-    #print(orders)
+    Returns:
+        NDArray[np.int_]: Rules of shape (R, 2)
+    """
+    rules = array('q')
+    for line in file:
+        line = line.strip()
+        if not line:
+            break
+        pre, _, post = line.partition('|')
+        rules.append(int(pre))
+        rules.append(int(post))
+    return np.frombuffer(rules, dtype=np.int64).reshape(-1, 2)
+
+def iter_update_batches(file: TextIO, batch_size: int = 65536) -> Iterator[Tuple[NDArray[np.int_], NDArray[np.int_]]]:
+    """
+    Read the updates line by line and yield them in batches as one flat buffer plus offsets.
+
+    Only one batch is held in memory at a time. The pages of update i of a batch are
+    values[offsets[i]:offsets[i+1]], np.split(values, offsets[1:-1]) gives views on all of them.
+
+    Yields:
+        Tuple[NDArray[np.int_], NDArray[np.int_]]: Flat page values and offsets of the batch
+    """
+    values = array('q')
+    offsets = array('q', [0])
+    for line in file:
+        line = line.strip()
+        if not line:
+            continue
+        values.extend(map(int, line.split(',')))
+        offsets.append(len(values))
+        if len(offsets) > batch_size:
+            yield np.frombuffer(values, dtype=np.int64), np.frombuffer(offsets, dtype=np.int64)
+            values = array('q')
+            offsets = array('q', [0])
+    if len(offsets) > 1:
+        yield np.frombuffer(values, dtype=np.int64), np.frombuffer(offsets, dtype=np.int64)
+
+def sum_center_pages(filename: str, fix_invalid: bool = False) -> int:
+    """
+    Sum of the center pages of the valid updates, or of the invalid updates after fixing their order.
+    """
+    center_sum = 0
+    with open(filename, "r") as f:
+        rules = read_rules(f)
+        preconditions = create_preconditions(rules)
+        rule_matrix = create_rule_matrix(rules)
+        for values, offsets in iter_update_batches(f):
+            orders = np.split(values, offsets[1:-1])
+            valid = check_valid_batch(rule_matrix, orders)
+            if fix_invalid:
+                selected = [fix_order(preconditions, o) for o, v in zip(orders, valid) if not v]
+            else:
+                selected = [o for o, v in zip(orders, valid) if v]
+            center_sum += sum(int(o[o.size//2]) for o in selected)
+    return center_sum
+
+def part1(filename: str) -> int:
+    return sum_center_pages(filename)
+
+def part2(filename: str) -> int:
+    return sum_center_pages(filename, fix_invalid=True)
+
+if __name__=='__main__':
+    print(part1("Day5/input.txt"))
+    print(part2("Day5/input.txt"))
@@ -1,6 +1,14 @@
+import argparse
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
 import numpy as np
-from typing import Dict, Set, List, Tuple
+from multiprocessing import Pool, shared_memory
+from typing import Callable, Dict, Iterator, Optional, Sequence, Set, List, Tuple
 from numpy.typing import NDArray
+from utils import load_char_grid, make_lookup_table
 
 def convert_strings_to_array(string_array: List[str], rules=None) -> NDArray[np.int_]:
     if not rules:
@@ -8,7 +16,14 @@ def convert_strings_to_array(string_array: List[str], rules=None) -> NDArray[np.
     number_lists = [[rules.get(char, 0) for char in s] for s in string_array]
     return np.array(number_lists, dtype=int)
 
-def go_up(maze: NDArray[np.int_], cur_pos: NDArray[np.int_]) -> None:
+MAZE_CODES: Dict[str, int] = {'.':0,'#':-1,'^':2,'>':3,'v':4,'<':5}
+MAZE_LOOKUP = make_lookup_table(MAZE_CODES, dtype=np.int_)
+
+def load_maze(filename: str) -> NDArray[np.int_]:
+    """Load the maze with the codes of convert_strings_to_array, translating all cells in one step."""
+    return load_char_grid(filename, MAZE_LOOKUP)
+
+def go_up(maze: NDArray[np.int_], cur_pos: Tuple[int, int]) -> Tuple[int, int]:
     col = maze[:,cur_pos[1]]
     closest_obstacle = np.argwhere(col==-1)
     # Default value if no obstacle can be found
@@ -18,7 +33,7 @@ def go_up(maze: NDArray[np.int_], cur_pos: NDArray[np.int_]) -> None:
         closest_obstacle = -1
     else:
         # Only consider elements that are above the current position
-        closest_obstacle = np.array([co for co in closest_obstacle if co < cur_pos[0]])
+        closest_obstacle = closest_obstacle[closest_obstacle < cur_pos[0]]
         # Check if "closest" object is below the guard --> Then we move to the top of the maze
         if closest_obstacle.size == 0:
             #print("No obstacle above. Moving to the top of the maze")
@@ -29,39 +44,41 @@ def go_up(maze: NDArray[np.int_], cur_pos: NDArray[np.int_]) -> None:
             closest_obstacle = closest_obstacle.max()
     # Subtract 1 because we do not want to overwrite the obstacle
     distance = cur_pos[0]-closest_obstacle-1 
-    new_position = tuple([cur_pos[0]-distance,cur_pos[1]])
+    new_position = (int(cur_pos[0]-distance), int(cur_pos[1]))
     # Add one as the guard has moved from the original position and thus we overwrite it
     maze[new_position[0]:cur_pos[0]+1, cur_pos[1]] = 1
     # Make a 90 degree turn --> Next orientation is to the right
     maze[new_position] = 3
+    return new_position
     
 
-def go_down(maze: NDArray[np.int_], cur_pos: NDArray[np.int_]) -> None:
+def go_down(maze: NDArray[np.int_], cur_pos: Tuple[int, int]) -> Tuple[int, int]:
     col = maze[:,cur_pos[1]]
     # Scan from the bottom (max) as we are going down
     closest_obstacle = np.argwhere(col==-1)
     # Default value if no obstacle can be found
     if closest_obstacle.size==0:
         #print("No obstacle below. Moving to the bottom of the maze")
-        closest_obstacle = maze.shape[1]
+        closest_obstacle = maze.shape[0]
     else:
         # Only consider elements that are below the current position
-        closest_obstacle = np.array([co for co in closest_obstacle if co > cur_pos[0]])
+        closest_obstacle = closest_obstacle[closest_obstacle > cur_pos[0]]
         # Check if "closest" object is above the guard --> Then we move to the bottom of the maze
         if closest_obstacle.size == 0:
             #print("No obstacle below. Moving to the bottom of the maze")
-            closest_obstacle = maze.shape[1]
+            closest_obstacle = maze.shape[0]
         else:
             # Scan from the bottom as we are going up 
             closest_obstacle = closest_obstacle.min()
     # Don't subtract 1 because we we are going down and thus indexing is fine
     distance = closest_obstacle-cur_pos[0]
-    new_position = tuple([cur_pos[0]+distance-1,cur_pos[1]])
+    new_position = (int(cur_pos[0]+distance-1), int(cur_pos[1]))
     maze[cur_pos[0]:new_position[0], cur_pos[1]] = 1
     # Make a 90 degree turn --> Next orientation is to the left
     maze[new_position] = 5
+    return new_position
 
-def go_left(maze: NDArray[np.int_], cur_pos: NDArray[np.int_]) -> None:
+def go_left(maze: NDArray[np.int_], cur_pos: Tuple[int, int]) -> Tuple[int, int]:
     row = maze[cur_pos[0],:]
     closest_obstacle = np.argwhere(row==-1)
     
@@ -72,7 +89,7 @@ def go_left(maze: NDArray[np.int_], cur_pos: NDArray[np.int_]) -> None:
         closest_obstacle = -1
     else:
         # Only consider elements that are to the left the current position
-        closest_obstacle = np.array([co for co in closest_obstacle if co < cur_pos[1]])
+        closest_obstacle = closest_obstacle[closest_obstacle < cur_pos[1]]
         # Check if "closest" object is right the guard --> Then we move to the left of the maze
         if closest_obstacle.size == 0:
             #print("Only obstacle to the right. Moving to the left of the maze")
@@ -84,96 +101,401 @@ def go_left(maze: NDArray[np.int_], cur_pos: NDArray[np.int_]) -> None:
     
     # Subtract 1 because we do not want to overwrite the obstacle
     distance = cur_pos[1]-closest_obstacle-1
-    new_position = tuple([cur_pos[0],cur_pos[1]-distance])
+    new_position = (int(cur_pos[0]), int(cur_pos[1]-distance))
     # Add one as the guard has moved from the original position and thus we overwrite it
     maze[cur_pos[0], new_position[1]:cur_pos[1]+1] = 1
     # Make a 90 degree turn --> Next orientation is to the up
     maze[new_position] = 2
+    return new_position
 
-def go_right(maze: NDArray[np.int_], cur_pos: NDArray[np.int_]) -> None:
+def go_right(maze: NDArray[np.int_], cur_pos: Tuple[int, int]) -> Tuple[int, int]:
     row = maze[cur_pos[0],:]
     closest_obstacle = np.argwhere(row==-1)
     
     # Default value if no obstacle can be found
     if closest_obstacle.size==0:
         #print("Only obstacle to the left. Moving to the right of the maze")
-        closest_obstacle = maze.shape[0]
+        closest_obstacle = maze.shape[1]
     else:
         # Only consider elements that are to the right the current position
-        closest_obstacle = np.array([co for co in closest_obstacle if co > cur_pos[1]])
+        closest_obstacle = closest_obstacle[closest_obstacle > cur_pos[1]]
         # Check if "closest" object is left the guard --> Then we move to the right of the maze
         if closest_obstacle.size == 0:
             #print("Only obstacle to the left. Moving to the right of the maze")
-            closest_obstacle = maze.shape[0]
+            closest_obstacle = maze.shape[1]
         else:
             # Scan from the right as we are going right
             closest_obstacle = closest_obstacle.min()
     
     # Subtract 1 because we do not want to overwrite the obstacle
     distance = closest_obstacle-cur_pos[1]-1 
-    new_position = tuple([cur_pos[0],cur_pos[1]+distance])
+    new_position = (int(cur_pos[0]), int(cur_pos[1]+distance))
     # Add one as the guard has moved from the original position and thus we overwrite it
     maze[cur_pos[0], cur_pos[1]:new_position[1]] = 1
     # Make a 90 degree turn --> Next orientation is to the down
     maze[new_position] = 4
+    return new_position
+
+# Row/column offsets per heading, indexed by maze direction code - 2 (up, right, down, left)
+HEADINGS: Tuple[Tuple[int, int], ...] = ((-1, 0), (0, 1), (1, 0), (0, -1))
+
+# Leg of the patrol for each direction code in the maze
+MOVES: Dict[int, Callable[[NDArray[np.int_], Tuple[int, int]], Tuple[int, int]]] = {2: go_up, 3: go_right, 4: go_down, 5: go_left}
 
-def traverse_maze(maze: NDArray[np.int_], visited_positions: List[Tuple[Tuple[int, int], int]]) -> bool:
-    curr_pos = np.argwhere(maze>=2)[0]
-    # Check if border of maze has been reached (-1 as shape is not 0-indexed)
-    if curr_pos[0]<= 0 or curr_pos[1] <= 0 or curr_pos[0] >= maze.shape[0]-1 or curr_pos[1] >= maze.shape[1]-1:
-        #print("Guard has reached the end of the maze")
+def next_leg(maze: NDArray[np.int_], pos: Tuple[int, int], direction: int) -> Optional[Tuple[Tuple[int, int], int]]:
+    """
+    Walk the guard from pos until the next turn and mark the traversed fields.
+
+    Returns:
+        Optional[Tuple[Tuple[int, int], int]]: Position and direction code after the turn
+        or None if the guard walks out of the maze
+    """
+    if direction not in MOVES:
+        raise ValueError(f'Invalid value for direction: {direction}')
+    new_pos = MOVES[direction](maze, pos)
+    # The leg also ends at the border, but the guard only leaves if the next step is outside the maze.
+    # Standing on the border otherwise (e.g. after turning there) the guard keeps patrolling.
+    row, col = new_pos[0]+HEADINGS[direction-2][0], new_pos[1]+HEADINGS[direction-2][1]
+    if not (0 <= row < maze.shape[0] and 0 <= col < maze.shape[1]):
         # Set the final element as a "visited" field
-        maze[tuple(curr_pos)] = 1
-        #print(maze)
-        return 0
-    if tuple(curr_pos) in [vp for vp,_ in visited_positions]:
-        #print(f"Already visited {curr_pos} checking for orientation")
-        if any(e==maze[tuple(curr_pos)] for e in [d for vp,d in visited_positions if vp==tuple(curr_pos)]):
-            print(f"Same orientation and position {tuple(curr_pos)}. Guard is walking in a circle")
-            return 1
-        #else:
-            #print(f'New orientation: {maze[tuple(curr_pos)]}')
-    visited_positions.append([tuple(curr_pos)] + [maze[tuple(curr_pos)]])
-    match maze[tuple(curr_pos)]:
+        maze[new_pos] = 1
+        return None
+    # Turning by 90 degrees cycles the direction codes 2 -> 3 -> 4 -> 5 -> 2
+    return new_pos, (direction-1)%4+2
+
+def traverse_maze(maze: NDArray[np.int_], cycle_detection: str = "bitset") -> int:
+    """
+    Let the guard patrol the maze and mark every traversed field with 1.
+
+    The walk is iterative so long patrols are not limited by the recursion depth.
+    With cycle_detection="bitset" every (position, direction) after a turn is recorded in a
+    bytearray holding one bit per cell*4+direction. With "brent" Brent's cycle detection
+    is used instead which only keeps two states and thus needs constant memory.
+
+    Args:
+        maze (NDArray[np.int_]): Maze as created by convert_strings_to_array, modified in place
+        cycle_detection (str): Either "bitset" or "brent"
+
+    Returns:
+        int: 1 if the guard is walking in a circle, 0 if it leaves the maze
+    """
+    guard = np.argwhere(maze>=2)[0]
+    state = ((int(guard[0]), int(guard[1])), int(maze[tuple(guard)]))
+    match cycle_detection:
+        case "bitset":
+            width = maze.shape[1]
+            visited = bytearray((maze.size*4+7)//8)
+            while state is not None:
+                (row, col), direction = state
+                index = (row*width+col)*4 + direction-2
+                if visited[index >> 3] & (1 << (index & 7)):
+                    return 1
+                visited[index >> 3] |= 1 << (index & 7)
+                state = next_leg(maze, *state)
+            return 0
+        case "brent":
+            power = cycle_length = 1
+            tortoise = state
+            hare = next_leg(maze, *state)
+            while hare is not None and hare != tortoise:
+                # Teleport the tortoise to the hare whenever the search window doubles
+                if power == cycle_length:
+                    tortoise = hare
+                    power *= 2
+                    cycle_length = 0
+                hare = next_leg(maze, *hare)
+                cycle_length += 1
+            return 0 if hare is None else 1
+        case _:
+            raise ValueError(f'Invalid cycle detection mode: {cycle_detection}')
+
+def find_guard(maze: NDArray[np.int_]) -> Tuple[Tuple[int, int], int]:
+    """
+    Locate the guard in the maze.
+
+    Returns:
+        Tuple[Tuple[int, int], int]: Position of the guard and heading index into HEADINGS
+    """
+    guard = np.argwhere(maze>=2)[0]
+    return (int(guard[0]), int(guard[1])), int(maze[tuple(guard)])-2
+
+def build_jump_arrays(maze: NDArray[np.int_]) -> NDArray[np.int32]:
+    """
+    Precompute the nearest obstacle in every heading for each cell of the maze.
+
+    The tables are flat rows indexed by row*width+col, one per heading (up, right, down, left).
+    For up/down the entry is the row of the next obstacle, for left/right its column.
+    If there is no obstacle the entry lies just outside the maze (-1, height or width),
+    so running into it means the guard leaves the maze.
+
+    Args:
+        maze (NDArray[np.int_]): Maze as created by convert_strings_to_array
+
+    Returns:
+        NDArray[np.int32]: Compact jump tables of shape (4, height*width) for the headings up, right, down and left
+    """
+    height, width = maze.shape
+    obstacles = maze==-1
+    rows = np.broadcast_to(np.arange(height)[:, None], maze.shape)
+    cols = np.broadcast_to(np.arange(width)[None, :], maze.shape)
+    # Running max/min over the obstacle coordinates, shifted by one so a cell does not see itself
+    up = np.full(maze.shape, -1)
+    up[1:] = np.maximum.accumulate(np.where(obstacles, rows, -1), axis=0)[:-1]
+    down = np.full(maze.shape, height)
+    down[:-1] = np.minimum.accumulate(np.where(obstacles, rows, height)[::-1], axis=0)[::-1][1:]
+    left = np.full(maze.shape, -1)
+    left[:, 1:] = np.maximum.accumulate(np.where(obstacles, cols, -1), axis=1)[:, :-1]
+    right = np.full(maze.shape, width)
+    right[:, :-1] = np.minimum.accumulate(np.where(obstacles, cols, width)[:, ::-1], axis=1)[:, ::-1][:, 1:]
+    return np.stack([up, right, down, left]).reshape(4, -1).astype(np.int32)
+
+def build_jump_tables(maze: NDArray[np.int_]) -> List[List[int]]:
+    """Jump tables of build_jump_arrays as lists, whose items are looked up faster than array elements."""
+    return build_jump_arrays(maze).tolist()
+
+def jump(tables: Sequence[Sequence[int]], shape: Tuple[int, int], cell: int, heading: int, extra: Tuple[int, int] = (-1, -1)) -> int:
+    """
+    Move the guard from cell in the given heading until it stands in front of an obstacle.
+
+    The tables are only read. An additional obstacle at extra is hit instead of the one from
+    the tables if it lies in between, so candidates are checked without patching the tables.
+
+    Returns:
+        int: Flat index of the cell in front of the obstacle or -1 if the guard leaves the maze
+    """
+    height, width = shape
+    obstacle = tables[heading][cell]
+    row, col = divmod(cell, width)
+    match heading:
+        case 0:
+            if col == extra[1] and obstacle < extra[0] < row:
+                obstacle = extra[0]
+            return -1 if obstacle < 0 else (obstacle+1)*width + col
+        case 1:
+            if row == extra[0] and col < extra[1] < obstacle:
+                obstacle = extra[1]
+            return -1 if obstacle >= width else row*width + obstacle-1
         case 2:
-            #print("Going up")
-            go_up(maze, curr_pos)
-            #print(maze)
-        case 3:
-            #print("Going right")
-            go_right(maze, curr_pos)
-            #print(maze)
-        case 4:
-            #print("Going down")
-            go_down(maze, curr_pos)
-            #print(maze)
-        case 5:
-            #print("Going left")
-            go_left(maze, curr_pos)
-            #print(maze)
+            if col == extra[1] and row < extra[0] < obstacle:
+                obstacle = extra[0]
+            return -1 if obstacle >= height else (obstacle-1)*width + col
         case _:
-            raise ValueError(f'Invalid value for direction: {maze[curr_pos]}')
-    return traverse_maze(maze, visited_positions)
+            if row == extra[0] and obstacle < extra[1] < col:
+                obstacle = extra[1]
+            return -1 if obstacle < 0 else row*width + obstacle+1
+
+def walk_jumps(tables: Sequence[Sequence[int]], shape: Tuple[int, int], cell: int, heading: int, extra: Tuple[int, int] = (-1, -1)) -> bool:
+    """
+    Let the guard patrol using the jump tables, optionally with an additional obstacle at extra.
+
+    Returns:
+        bool: True if the guard walks in a circle, False if it leaves the maze
+    """
+    turns = set()
+    while True:
+        cell = jump(tables, shape, cell, heading, extra)
+        if cell < 0:
+            return False
+        heading = (heading+1)%4
+        state = cell*4+heading
+        if state in turns:
+            return True
+        turns.add(state)
+
+def trace_patrol(tables: List[List[int]], shape: Tuple[int, int], cell: int, heading: int) -> Dict[int, Tuple[int, int]]:
+    """
+    Follow the unobstructed patrol and record every cell the guard steps on.
+
+    If the patrol itself is a loop the walk stops once a turn repeats, as walk_jumps does.
+
+    Returns:
+        Dict[int, Tuple[int, int]]: Visited cells in patrol order mapped to the cell and heading
+        from which the guard first steps on them. The start maps to (-1, heading).
+    """
+    height, width = shape
+    path = {cell: (-1, heading)}
+    turns = set()
+    while True:
+        stop = jump(tables, shape, cell, heading)
+        step = HEADINGS[heading][0]*width + HEADINGS[heading][1]
+        leaves_maze = stop < 0
+        if leaves_maze:
+            # Walk to the border of the maze
+            row, col = divmod(cell, width)
+            match heading:
+                case 0: stop = col
+                case 1: stop = row*width + width-1
+                case 2: stop = (height-1)*width + col
+                case _: stop = row*width
+        for previous in range(cell, stop, step):
+            path.setdefault(previous+step, (previous, heading))
+        if leaves_maze:
+            return path
+        cell, heading = stop, (heading+1)%4
+        state = cell*4+heading
+        if state in turns:
+            return path
+        turns.add(state)
+
+def check_obstruction_candidates(tables: Sequence[Sequence[int]], shape: Tuple[int, int], candidates: List[Tuple[int, int, int]]) -> List[Tuple[int, int]]:
+    """
+    Place each candidate obstacle in turn and check whether the guard gets trapped.
+
+    Args:
+        tables (Sequence[Sequence[int]]): Jump tables of the unobstructed maze, only read
+        shape (Tuple[int, int]): Shape of the maze
+        candidates (List[Tuple[int, int, int]]): Candidate cell together with the cell and heading
+            from which the guard first steps on it
+
+    Returns:
+        List[Tuple[int, int]]: Positions of the candidates that trap the guard
+    """
+    width = shape[1]
+    obstructions = []
+    for cell, entry, entry_heading in candidates:
+        pos = divmod(cell, width)
+        if walk_jumps(tables, shape, entry, entry_heading, pos):
+            obstructions.append(pos)
+    return obstructions
+
+# Per process state of the obstruction workers, set up once by _init_obstruction_worker
+_worker_tables: List[memoryview] = []
+_worker_shape: Tuple[int, int] = (0, 0)
+_worker_shm: Optional[shared_memory.SharedMemory] = None
+
+def _init_obstruction_worker(shm_name: str, shape: Tuple[int, int]) -> None:
+    global _worker_tables, _worker_shape, _worker_shm
+    # Kept open for the lifetime of the worker as the tables are views on it
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    # Indexing an int32 memoryview yields Python ints without copying the tables
+    cells = shape[0]*shape[1]
+    view = _worker_shm.buf.cast('i')
+    _worker_tables = [view[heading*cells:(heading+1)*cells] for heading in range(4)]
+    _worker_shape = shape
+
+def _check_candidates_worker(candidates: List[Tuple[int, int, int]]) -> Tuple[int, List[Tuple[int, int]]]:
+    return len(candidates), check_obstruction_candidates(_worker_tables, _worker_shape, candidates)
+
+def iter_loop_obstructions(maze: NDArray[np.int_], workers: int = 1, chunk_size: int = 256) -> Iterator[Tuple[int, List[Tuple[int, int]]]]:
+    """
+    Check all obstruction candidates in chunks and stream the results chunk by chunk.
+
+    Only cells on the original patrol are candidates since an obstacle anywhere else is never hit.
+    For each candidate the walk is resumed right before the guard would first step on it as
+    the path up to that point is unaffected by the obstacle.
+    With more than one worker the chunks are distributed over a process pool. The jump tables
+    are built once as compact int32 arrays in shared memory which all workers read without
+    copying, so only the small candidate chunks are sent to the workers.
+
+    Args:
+        maze (NDArray[np.int_]): Maze as created by convert_strings_to_array
+        workers (int): Number of worker processes, 1 runs everything in the current process
+        chunk_size (int): Number of candidates handed to a worker at once
+
+    Yields:
+        Tuple[int, List[Tuple[int, int]]]: Number of checked candidates and the trapping positions among them
+    """
+    start, heading = find_guard(maze)
+    width = maze.shape[1]
+    arrays = build_jump_arrays(maze)
+    # List items are looked up fastest, but with workers the parent only needs views on the int32 tables
+    tables = arrays.tolist() if workers <= 1 else [memoryview(table) for table in arrays]
+    path = trace_patrol(tables, maze.shape, start[0]*width+start[1], heading)
+    candidates = [(cell, entry, entry_heading) for cell, (entry, entry_heading) in path.items() if entry >= 0]
+    chunks = [candidates[i:i+chunk_size] for i in range(0, len(candidates), chunk_size)]
+    if walk_jumps(tables, maze.shape, start[0]*width+start[1], heading):
+        # The patrol already is a loop which an obstacle off the path never breaks
+        off_path = [pos for pos in map(tuple, np.argwhere(maze==0).tolist()) if pos[0]*width+pos[1] not in path]
+        yield len(off_path), off_path
+    if workers <= 1:
+        for chunk in chunks:
+            yield len(chunk), check_obstruction_candidates(tables, maze.shape, chunk)
+        return
+    # The tables are shared read-only, every worker only adds its own candidate obstacle
+    shm = shared_memory.SharedMemory(create=True, size=arrays.nbytes)
+    try:
+        np.ndarray(arrays.shape, dtype=arrays.dtype, buffer=shm.buf)[:] = arrays
+        with Pool(workers, initializer=_init_obstruction_worker, initargs=(shm.name, maze.shape)) as pool:
+            yield from pool.imap(_check_candidates_worker, chunks)
+    finally:
+        shm.close()
+        shm.unlink()
+
+def find_loop_obstructions(maze: NDArray[np.int_], workers: int = 1, chunk_size: int = 256, report: bool = False) -> List[Tuple[int, int]]:
+    """
+    Find all positions where a single additional obstacle makes the guard walk in a circle.
+
+    Args:
+        maze (NDArray[np.int_]): Maze as created by convert_strings_to_array
+        workers (int): Number of worker processes, see iter_loop_obstructions
+        chunk_size (int): Number of candidates handed to a worker at once
+        report (bool): Print the number of checked candidates and the throughput
+
+    Returns:
+        List[Tuple[int, int]]: Positions of all obstacles that trap the guard
+    """
+    obstructions = []
+    checked = 0
+    start_time = time.perf_counter()
+    for num_candidates, chunk_obstructions in iter_loop_obstructions(maze, workers, chunk_size):
+        obstructions.extend(chunk_obstructions)
+        checked += num_candidates
+    if report:
+        elapsed = time.perf_counter() - start_time
+        print(f"Checked {checked} candidates in {elapsed:.3f}s ({checked/max(elapsed, 1e-9):.0f} candidates/s, {workers} workers)")
+    return obstructions
+
+def verify_loop_obstructions(maze: NDArray[np.int_], obstructions: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """
+    Cross check obstruction results against traverse_maze on every cell of the original patrol.
+
+    Returns:
+        List[Tuple[int, int]]: Positions for which both methods disagree
+    """
+    start, heading = find_guard(maze)
+    width = maze.shape[1]
+    tables = build_jump_tables(maze)
+    path = trace_patrol(tables, maze.shape, start[0]*width+start[1], heading)
+    found = set(obstructions)
+    mismatches = []
+    if walk_jumps(tables, maze.shape, start[0]*width+start[1], heading):
+        # Obstacles off a looping patrol trap the guard as well
+        path = range(maze.size)
+    for cell in path:
+        pos = divmod(cell, width)
+        if pos == start or maze[pos] == -1:
+            continue
+        blocked_maze = maze.copy()
+        blocked_maze[pos] = -1
+        if bool(traverse_maze(blocked_maze)) != (pos in found):
+            mismatches.append(pos)
+    return mismatches
+
+def part1(filename: str) -> int:
+    maze = load_maze(filename)
+    start, heading = find_guard(maze)
+    return len(trace_patrol(build_jump_tables(maze), maze.shape, start[0]*maze.shape[1]+start[1], heading))
+
+def part2(filename: str) -> int:
+    return len(find_loop_obstructions(load_maze(filename)))
 
 if __name__=='__main__':
-    with open("Day6/input.txt", "r") as f:
-        maze = np.array(f.read().splitlines())
-    maze = convert_strings_to_array(maze)
+    parser = argparse.ArgumentParser(description="Guard patrol of day 6")
+    parser.add_argument("--input", default="Day6/input.txt", help="Input file")
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes for the obstruction search")
+    parser.add_argument("--verify", action="store_true", help="Cross check the obstructions against traverse_maze")
+    args = parser.parse_args()
+    maze = load_maze(args.input)
     #print(maze)
     print("Checking of unobstructed total traversed fields")
-    num_traversed_fields = np.sum(maze==1)
-    print(num_traversed_fields)
+    start, heading = find_guard(maze)
+    path = trace_patrol(build_jump_tables(maze), maze.shape, start[0]*maze.shape[1]+start[1], heading)
+    print(len(path))
     
     print("Checking for blocks")
-    blocked = 0
-    cur_pos = tuple(np.argwhere(maze>=2)[0])
-    for i in range(maze.shape[0]):
-        for j in range(maze.shape[1]):
-            if (i,j) == cur_pos:
-                continue
-            print(f"Blocking position {i,j}")
-            blocked_maze = maze.copy()
-            blocked_maze[i,j] = -1
-            blocked += traverse_maze(blocked_maze, [])
-    # Divide by two 
-    print(blocked)
\ No newline at end of file
+    obstructions = find_loop_obstructions(maze, workers=args.workers, report=True)
+    print(len(obstructions))
+    
+    if args.verify:
+        print("Verifying against traverse_maze")
+        print(verify_loop_obstructions(maze, obstructions))
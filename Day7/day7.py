@@ -1,7 +1,15 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 import numpy as np
-from typing import List, Tuple, Callable
+from array import array
+from multiprocessing import Pool, shared_memory
+from typing import Dict, List, NamedTuple, Tuple, Callable, Union
 from itertools import product
-from operator import mul, add
+from operator import add, floordiv, mul, sub
+from timeit import timeit
+from utils import iter_int_rows
 
 def extract_data(filename: str) -> List[Tuple[int, List[int]]]:
     """
@@ -35,7 +43,22 @@ def extract_data(filename: str) -> List[Tuple[int, List[int]]]:
     
     return parsed_data
 
+# Smallest power of ten above the smallest number of each bit length. A number of that
+# bit length is either below it or below the next power of ten.
+POWER_OF_TEN_BY_BITS: List[int] = [10] + [10**len(str(1 << (bits-1))) for bits in range(1, 257)]
+
+def next_power_of_ten(num: int) -> int:
+    """Smallest power of ten larger than num, i.e. 10**(number of digits of num)."""
+    bits = num.bit_length()
+    if bits >= len(POWER_OF_TEN_BY_BITS):
+        return 10**len(str(num))
+    power = POWER_OF_TEN_BY_BITS[bits]
+    return power if num < power else power*10
+
 def concat(num1: int, num2: int) -> int:
+    return num1 * next_power_of_ten(num2) + num2
+
+def concat_string(num1: int, num2: int) -> int:
     return int(f"{num1}{num2}")
 
 def check_equation(eq: Tuple[int, List[int]], operators: List[Callable] = [mul, add]) -> bool:
@@ -59,10 +82,243 @@ def check_equation(eq: Tuple[int, List[int]], operators: List[Callable] = [mul,
             return True
     return False
 
+class Operator(NamedTuple):
+    """Operator of the equations together with what is needed to undo it."""
+    # Applied left to right as forward(current, num)
+    forward: Callable[[int, int], int]
+    # Recovers current from inverse(target, num)
+    inverse: Callable[[int, int], int]
+    # Pruning predicate whether target can be the result of forward(current, num) for any integer current
+    can_undo: Callable[[int, int], bool]
+    # Whether forward(current, num) >= current for all positive current and num, i.e. results never shrink
+    monotone: bool = False
+
+def undo_concat(target: int, num: int) -> int:
+    return target // next_power_of_ten(num)
+
+def can_undo_concat(target: int, num: int) -> bool:
+    return target % next_power_of_ten(num) == num
+
+# Registered operators by name. Operands are positive so a zero factor can not be undone.
+OPERATORS: Dict[str, Operator] = {
+    "add": Operator(add, sub, lambda target, num: True, monotone=True),
+    "mul": Operator(mul, floordiv, lambda target, num: num != 0 and target % num == 0, monotone=True),
+    "concat": Operator(concat, undo_concat, can_undo_concat, monotone=True),
+}
+
+def register_operator(name: str, forward: Callable[[int, int], int], inverse: Callable[[int, int], int], can_undo: Callable[[int, int], bool] = lambda target, num: True, monotone: bool = False) -> Operator:
+    """
+    Register a custom operator for check_equation_reverse, e.g. register_operator("xor", xor, xor).
+
+    Args:
+        name: Name to refer to the operator
+        forward: Operator applied as forward(current, num)
+        inverse: Inverse so that inverse(forward(current, num), num) == current
+        can_undo: Pruning predicate, return False if target can never be the result of forward(current, num)
+            for any integer current
+        monotone: Set only if forward(current, num) >= current for all positive current and num (unlike e.g. sub),
+            which allows pruning every target below the first number
+
+    Returns:
+        The registered operator
+    """
+    operator = Operator(forward, inverse, can_undo, monotone)
+    OPERATORS[name] = operator
+    return operator
+
+def resolve_operator(op: Union[str, Callable[[int, int], int]]) -> Operator:
+    if isinstance(op, str):
+        return OPERATORS[op]
+    for operator in OPERATORS.values():
+        if operator.forward is op:
+            return operator
+    raise KeyError(f"No registered operator for {op}")
+
+def check_equation_reverse(eq: Tuple[int, List[int]], operators: List[Union[str, Callable]] = [mul, add]) -> bool:
+    """
+    Check if the equation can be solved by working backwards from the target.
+
+    Starting with the last number each operator is undone only if its pruning predicate
+    allows it (e.g. division without remainder for mul) so whole branches of operator
+    combinations are pruned without ever building them.
+
+    Args:
+        eq: Tuple of the target and the numbers of the equation
+        operators: Names or forward functions of operators registered in OPERATORS
+
+    Returns:
+        True if some combination of the operators evaluated left to right yields the target
+    """
+    target, numbers = eq
+    resolved = [resolve_operator(op) for op in operators]
+    # Results of monotone operators on positive numbers never drop below the first number
+    monotone = all(operator.monotone for operator in resolved) and min(numbers) > 0
+    def solvable(target: int, last: int) -> bool:
+        if last == 0:
+            return target == numbers[0]
+        if monotone and target < numbers[0]:
+            return False
+        num = numbers[last]
+        for operator in resolved:
+            if operator.can_undo(target, num) and solvable(operator.inverse(target, num), last-1):
+                return True
+        return False
+    return solvable(target, len(numbers)-1)
+
+def check_equation_exhaustive(eq: Tuple[int, List[int]], operators: List[Union[str, Callable]]) -> bool:
+    """Reference solver trying every operator combination without any pruning."""
+    target, numbers = eq
+    forwards = [resolve_operator(op).forward for op in operators]
+    for ops in product(forwards, repeat=len(numbers)-1):
+        current = numbers[0]
+        for op, num in zip(ops, numbers[1:]):
+            current = op(current, num)
+        if current == target:
+            return True
+    return False
+
+def verify_operators(equations: List[Tuple[int, List[int]]], operators: List[Union[str, Callable]]) -> List[Tuple[int, List[int]]]:
+    """
+    Cross-check check_equation_reverse against the exhaustive solver, e.g. after registering a custom operator.
+
+    Returns:
+        List of the equations where both solvers disagree (empty if consistent)
+    """
+    return [eq for eq in equations if check_equation_reverse(eq, operators) != check_equation_exhaustive(eq, operators)]
+
+def extract_data_flat(filename: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Extract the equations into flat arrays instead of one list per line.
+
+    Args:
+        filename: Path to the input text file formatted as 'key: value1 value2 ...'
+
+    Returns:
+        Tuple of the targets, all operands concatenated and the offsets so that the operands of
+        equation i are operands[offsets[i]:offsets[i+1]]
+    """
+    # array keeps the values packed while reading the chunks of lines
+    targets = array('q')
+    operands = array('q')
+    offsets = array('q', [0])
+    for values, rows in iter_int_rows(filename, separators=b" :\t\r"):
+        # The first value of every line is the target, the rest are its operands
+        targets.frombytes(values[rows[:-1]].tobytes())
+        offsets.frombytes((rows[1:] - np.arange(1, rows.size) + len(operands)).tobytes())
+        operands.frombytes(np.delete(values, rows[:-1]).tobytes())
+    return np.frombuffer(targets, dtype=np.int64), np.frombuffer(operands, dtype=np.int64), np.frombuffer(offsets, dtype=np.int64)
+
+def evaluate_equation_range(targets: np.ndarray, operands: np.ndarray, offsets: np.ndarray, start: int, stop: int) -> np.ndarray:
+    """
+    Evaluate the equations start to stop for both operator sets.
+
+    Returns:
+        np.ndarray: Boolean array of shape (stop-start, 2) with the results for [mul, add] and [mul, add, concat]
+    """
+    results = np.zeros((stop-start, 2), dtype=bool)
+    numbers = operands[offsets[start]:offsets[stop]].tolist()
+    bounds = (offsets[start:stop+1] - offsets[start]).tolist()
+    for i, target in enumerate(targets[start:stop].tolist()):
+        eq = (target, numbers[bounds[i]:bounds[i+1]])
+        # Every equation solvable without concat is also solvable with it
+        if check_equation_reverse(eq, [mul, add]):
+            results[i] = True
+        else:
+            results[i, 1] = check_equation_reverse(eq, [mul, add, concat])
+    return results
+
+# Per process views on the shared equation arrays, set up once by _init_equation_worker
+_worker_arrays: List[np.ndarray] = []
+_worker_shms: List[shared_memory.SharedMemory] = []
+
+def _share_array(arr: np.ndarray) -> shared_memory.SharedMemory:
+    shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+    np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[:] = arr
+    return shm
+
+def _init_equation_worker(specs: List[Tuple[str, Tuple[int, ...]]]) -> None:
+    global _worker_arrays, _worker_shms
+    _worker_shms = [shared_memory.SharedMemory(name=name) for name, _ in specs]
+    _worker_arrays = [np.ndarray(shape, dtype=np.int64, buffer=shm.buf) for shm, (_, shape) in zip(_worker_shms, specs)]
+
+def _evaluate_range_worker(bounds: Tuple[int, int]) -> Tuple[int, np.ndarray]:
+    return bounds[0], evaluate_equation_range(*_worker_arrays, *bounds)
+
+def evaluate_equations(targets: np.ndarray, operands: np.ndarray, offsets: np.ndarray, workers: int = 1, chunk_size: int = 4096) -> np.ndarray:
+    """
+    Evaluate all equations for both operator sets in a single pass.
+
+    With more than one worker the flat arrays are placed in shared memory once and only
+    the index ranges of the chunks are sent to the process pool.
+
+    Args:
+        targets, operands, offsets: Equations as returned by extract_data_flat
+        workers: Number of worker processes, 1 evaluates in the current process
+        chunk_size: Number of equations handed to a worker at once
+
+    Returns:
+        np.ndarray: Boolean array of shape (len(targets), 2) with the results for [mul, add] and [mul, add, concat]
+    """
+    num_equations = len(targets)
+    ranges = ((start, min(start+chunk_size, num_equations)) for start in range(0, num_equations, chunk_size))
+    if workers <= 1:
+        return np.concatenate([evaluate_equation_range(targets, operands, offsets, *bounds) for bounds in ranges] or [np.zeros((0, 2), dtype=bool)])
+    results = np.zeros((num_equations, 2), dtype=bool)
+    shms = [_share_array(np.ascontiguousarray(arr, dtype=np.int64)) for arr in (targets, operands, offsets)]
+    try:
+        specs = [(shm.name, arr.shape) for shm, arr in zip(shms, (targets, operands, offsets))]
+        with Pool(workers, initializer=_init_equation_worker, initargs=(specs,)) as pool:
+            for start, chunk_results in pool.imap_unordered(_evaluate_range_worker, ranges):
+                results[start:start+len(chunk_results)] = chunk_results
+    finally:
+        for shm in shms:
+            shm.close()
+            shm.unlink()
+    return results
+
+def benchmark_operators(targets: np.ndarray, operands: np.ndarray, offsets: np.ndarray, repeat: int = 5) -> Dict[str, float]:
+    """
+    Microbenchmark the arithmetic concat against the string based one on the operands of the input.
+
+    Returns:
+        Dict[str, float]: Best time in seconds per benchmark out of repeat runs
+    """
+    pairs = list(zip(operands[:-1].tolist(), operands[1:].tolist()))
+    def apply(op: Callable[[int, int], int]) -> Callable[[], None]:
+        return lambda: [op(a, b) for a, b in pairs]
+    def undo(can_undo: Callable[[int, int], bool]) -> Callable[[], None]:
+        return lambda: [can_undo(concat(a, b), b) for a, b in pairs]
+    def string_can_undo(target: int, num: int) -> bool:
+        return str(target).endswith(str(num))
+    # Single equations without multiprocessing so only the operators are compared
+    equations = [(t, operands[offsets[i]:offsets[i+1]].tolist()) for i, t in enumerate(targets.tolist())]
+    concat_ops = [add, mul, concat]
+    benchmarks = {
+        "concat (string)": apply(concat_string),
+        "concat (arithmetic)": apply(concat),
+        "undo concat (string)": undo(string_can_undo),
+        "undo concat (arithmetic)": undo(can_undo_concat),
+        "check_equation_reverse": lambda: [check_equation_reverse(eq, concat_ops) for eq in equations],
+    }
+    return {name: min(timeit(func, number=1) for _ in range(repeat)) for name, func in benchmarks.items()}
+
+def part1(filename: str) -> int:
+    targets, operands, offsets = extract_data_flat(filename)
+    return sum(targets[evaluate_equations(targets, operands, offsets)[:, 0]].tolist())
+
+def part2(filename: str) -> int:
+    targets, operands, offsets = extract_data_flat(filename)
+    return sum(targets[evaluate_equations(targets, operands, offsets)[:, 1]].tolist())
+
 if __name__ == "__main__":
-    equations = extract_data("Day7/input.txt")
-    valids_sum_simple = sum([eq[0] for eq in equations if check_equation(eq, [mul,add])])
+    targets, operands, offsets = extract_data_flat("Day7/input.txt")
+    results = evaluate_equations(targets, operands, offsets)
+    # Sum as Python ints since the totals of large files can exceed int64
+    valids_sum_simple = sum(targets[results[:, 0]].tolist())
     print(valids_sum_simple)
     
-    valids_sum_extended = sum([eq[0] for eq in equations if check_equation(eq, [mul,add, concat])])
-    print(valids_sum_extended)
\ No newline at end of file
+    valids_sum_extended = sum(targets[results[:, 1]].tolist())
+    print(valids_sum_extended)
+    
+    for name, seconds in benchmark_operators(targets, operands, offsets).items():
+        print(f"{name}: {seconds*1000:.3f}ms")
@@ -1,6 +1,11 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 import numpy as np
 from numpy.typing import NDArray
-from typing import List, Tuple, Callable
+from typing import Iterator, List, Tuple, Callable
+from utils import load_char_grid
 
 def max_scaling_factors(grid_bounds, start_position, distance_vector):
     """
@@ -39,9 +44,8 @@ def max_scaling_factors(grid_bounds, start_position, distance_vector):
     return -max_backward, max_forward
 
 def extract_data(filename: str) -> np.ndarray:
-    with open(filename, 'r') as file:
-        data = file.read().splitlines()
-    return np.array([list(d) for d in data])
+    # Reinterpret the byte grid as single characters instead of splitting every line in Python
+    return load_char_grid(filename).view('S1').astype(np.str_)
 
 def set_antinodes_frequency_location(antinodes: NDArray[np.int_], loc: Tuple[int,int], locations: NDArray[np.int_], resonant_harmonics: bool = False) -> None:
     # Calculate distances and vectors
@@ -78,12 +82,110 @@ def set_antinodes_frequency(antennas: NDArray[np.str_], antinodes: NDArray[np.in
         # with open(f'Day8/Output/output{freq}-{loc[0]}_{loc[1]}.txt', 'w') as f:
         #     np.savetxt(f, visual_antinodes, fmt="%s")
 
+def antenna_pairs(antennas: NDArray[np.str_]) -> Tuple[NDArray[np.int_], NDArray[np.int_]]:
+    """
+    All ordered pairs of distinct antennas with the same frequency, for all frequencies in one pass.
+
+    The antennas are grouped by sorting their frequencies once. Every antenna is then paired
+    with all antennas of its group by repeating it group size times next to the group's indices.
+
+    Returns:
+        Tuple[NDArray[np.int_], NDArray[np.int_]]: Locations of the first and second antenna of every pair, each of shape (pairs, 2)
+    """
+    is_antenna = antennas != '.'
+    locations = np.argwhere(is_antenna)
+    frequencies = antennas[is_antenna]
+    order = np.argsort(frequencies, kind='stable')
+    locations = locations[order]
+    _, group_starts, group_sizes = np.unique(frequencies[order], return_index=True, return_counts=True)
+    group_of = np.repeat(np.arange(group_sizes.size), group_sizes)
+    repeats = group_sizes[group_of]
+    first = np.repeat(np.arange(locations.shape[0]), repeats)
+    position_in_group = np.arange(first.size) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+    second = np.repeat(group_starts[group_of], repeats) + position_in_group
+    distinct = first != second
+    return locations[first[distinct]], locations[second[distinct]]
+
+def set_antinodes_pairwise(antinodes: NDArray[np.int_], first: NDArray[np.int_], second: NDArray[np.int_]) -> None:
+    """
+    Set the antinode behind the second antenna of every ordered pair (i.e. twice as far from the first).
+    Both antinodes of an antenna pair are covered by its two orderings.
+    """
+    positions = 2*second - first
+    inside = (positions >= 0).all(axis=1) & (positions[:, 0] < antinodes.shape[0]) & (positions[:, 1] < antinodes.shape[1])
+    antinodes[positions[inside, 0], positions[inside, 1]] = 1
+
+def axis_scale_range(start: NDArray[np.int_], step: NDArray[np.int_], size: int) -> Tuple[NDArray[np.int_], NDArray[np.int_]]:
+    """
+    Range [low, high] of scales k for which start + k*step lies in [0, size) along one axis.
+    Steps of 0 never leave the axis and get an unbounded range.
+    """
+    unbounded = np.iinfo(np.int64).max // 4
+    magnitude = np.where(step == 0, 1, np.abs(step))
+    # Steps along the axis and against it mirror the start position
+    distance_ahead = np.where(step >= 0, size-1-start, start)
+    distance_behind = np.where(step >= 0, start, size-1-start)
+    low = np.where(step == 0, -unbounded, -(distance_behind // magnitude))
+    high = np.where(step == 0, unbounded, distance_ahead // magnitude)
+    return low, high
+
+def iter_harmonic_points(first: NDArray[np.int_], second: NDArray[np.int_], shape: Tuple[int, int], max_points: int = 1 << 22) -> Iterator[NDArray[np.int_]]:
+    """
+    Rasterize the lines through every antenna pair within the map.
+
+    The distance vector of every pair is reduced by its gcd, so all grid positions exactly
+    in line are hit. The range of scales staying inside the map is computed in closed form
+    for all pairs and the points are generated with arange based index arithmetic, in chunks
+    of pairs with at most about max_points points to bound the memory.
+
+    Yields:
+        NDArray[np.int_]: Points on the lines of a chunk of pairs, of shape (points, 2), possibly with duplicates
+    """
+    # The line through a pair is the same for both orderings
+    forward = (first[:, 0] < second[:, 0]) | ((first[:, 0] == second[:, 0]) & (first[:, 1] < second[:, 1]))
+    first, second = first[forward], second[forward]
+    distances = second - first
+    steps = distances // np.gcd(distances[:, 0], distances[:, 1])[:, None]
+    row_low, row_high = axis_scale_range(first[:, 0], steps[:, 0], shape[0])
+    col_low, col_high = axis_scale_range(first[:, 1], steps[:, 1], shape[1])
+    lows = np.maximum(row_low, col_low)
+    counts = np.minimum(row_high, col_high) - lows + 1
+    ends = np.cumsum(counts)
+    # Split the pairs wherever the cumulative number of points passes another max_points
+    bounds = np.unique(np.concatenate(([0], np.searchsorted(ends, np.arange(max_points, ends[-1] if ends.size else 0, max_points)), [counts.size])))
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        chunk_counts = counts[start:stop]
+        pair = np.repeat(np.arange(start, stop), chunk_counts)
+        scales = np.repeat(lows[start:stop], chunk_counts) + np.arange(pair.size) - np.repeat(np.cumsum(chunk_counts) - chunk_counts, chunk_counts)
+        yield first[pair] + scales[:, None] * steps[pair]
+
+def set_antinodes_harmonic(antinodes: NDArray[np.int_], first: NDArray[np.int_], second: NDArray[np.int_]) -> None:
+    for points in iter_harmonic_points(first, second, antinodes.shape):
+        antinodes[points[:, 0], points[:, 1]] = 1
+
+def count_antinodes_harmonic(antennas: NDArray[np.str_]) -> int:
+    """
+    Number of distinct antinodes with resonant harmonics without allocating the antinode map.
+    """
+    found = np.zeros(0, dtype=np.int64)
+    for points in iter_harmonic_points(*antenna_pairs(antennas), antennas.shape):
+        found = np.union1d(found, points[:, 0] * antennas.shape[1] + points[:, 1])
+    return found.size
+
 def construct_antinodes(antennas: NDArray[np.str_], resonant_harmonics: bool = False) -> NDArray[np.int_]:
     antinodes = np.zeros_like(antennas, dtype=int)
-    frequencies = np.unique(antennas[antennas!='.'])
-    [set_antinodes_frequency(antennas, antinodes, freq, resonant_harmonics) for freq in frequencies]
+    if resonant_harmonics:
+        set_antinodes_harmonic(antinodes, *antenna_pairs(antennas))
+    else:
+        set_antinodes_pairwise(antinodes, *antenna_pairs(antennas))
     return antinodes
 
+def part1(filename: str) -> int:
+    return int(construct_antinodes(extract_data(filename)).sum())
+
+def part2(filename: str) -> int:
+    return count_antinodes_harmonic(extract_data(filename))
+
 if __name__ == '__main__':
     antennas = extract_data("Day8/input.txt")
     print(antennas)
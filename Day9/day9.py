@@ -1,5 +1,8 @@
+import heapq
+import mmap
+import os
 import numpy as np
-from typing import List, Tuple
+from typing import List, Tuple, Union
 
 def extract_data(path: str) -> str:
     with open(path, "r") as f:
@@ -114,17 +117,138 @@ def calc_checksum(discmap: np.ndarray) -> int:
     mult_map = discmap * np.arange(len(discmap), dtype=int)
     return mult_map[mult_map>0].sum()
     
+def series_sum(start: int, length: int) -> int:
+    """Sum of the positions start..start+length-1."""
+    return (2*start + length - 1) * length // 2
+
+def calc_checksum_stream(source: Union[str, bytes, mmap.mmap]) -> int:
+    """
+    Compact the disc elementwise (part 1) and compute the checksum without creating the discmap.
+
+    Args:
+        source: Path to the disc map file or a buffer (e.g. memory-mapped) with its ASCII digits
+
+    Returns:
+        int: Checksum of the compacted disc
+    """
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return 0
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                return calc_checksum_buffer(buffer)
+    return calc_checksum_buffer(source)
+
+def calc_checksum_buffer(buffer: Union[bytes, mmap.mmap]) -> int:
+    """
+    Two pointer compaction over the digits of the disc map.
+
+    The left pointer walks over files and free spans in order while the right pointer takes
+    blocks from the last file that has not been moved yet to fill the free spans.
+    Every run of blocks with the same id contributes id * series_sum(position, length).
+    """
+    # Ignore trailing newline or whitespace
+    end = len(buffer)
+    while end > 0 and not 48 <= buffer[end-1] <= 57:
+        end -= 1
+    if end == 0:
+        return 0
+    # Files are at even indices, skip a trailing free span
+    right = end-1 if (end-1) % 2 == 0 else end-2
+    remaining = buffer[right] - 48
+    checksum = 0
+    position = 0
+    left = 0
+    while left < right:
+        size = buffer[left] - 48
+        if left % 2 == 0:
+            checksum += (left//2) * series_sum(position, size)
+            position += size
+        else:
+            while size > 0 and left < right:
+                moved = min(size, remaining)
+                checksum += (right//2) * series_sum(position, moved)
+                position += moved
+                size -= moved
+                remaining -= moved
+                if remaining == 0:
+                    right -= 2
+                    remaining = buffer[right] - 48
+        left += 1
+    # Blocks of the last file that were not moved stay where they are
+    if left == right:
+        checksum += (right//2) * series_sum(position, remaining)
+    return checksum
+
+def create_spans(input: str) -> Tuple[List[Tuple[int, int, int]], List[List[int]]]:
+    """
+    Create a span based representation of the disc without one entry per block.
+
+    Returns:
+        Tuple[List[Tuple[int, int, int]], List[List[int]]]: Files as (start, length, id) sorted by id
+        and for every free span length 0-9 a min-heap of the start indices of the free spans
+    """
+    files = []
+    free_heaps: List[List[int]] = [[] for _ in range(10)]
+    start = 0
+    for i, size in enumerate(input.strip()):
+        size = int(size)
+        if i % 2 == 0:
+            files.append((start, size, i//2))
+        elif size > 0:
+            # Spans are created from left to right so the lists already satisfy the heap property
+            free_heaps[size].append(start)
+        start += size
+    return files, free_heaps
+
+def reorder_spans_blockwise(files: List[Tuple[int, int, int]], free_heaps: List[List[int]]) -> List[Tuple[int, int, int]]:
+    """
+    Move every file once, from the highest id down, into the leftmost free span that fits.
+
+    The leftmost fitting span is the smallest heap head over all lengths at least the file size.
+    Space freed by a moved file is never reused since only files left of it are processed afterwards.
+
+    Args:
+        files: Files as (start, length, id) as returned by create_spans
+        free_heaps: Min-heaps of free span starts per length, modified in place
+
+    Returns:
+        List[Tuple[int, int, int]]: Files as (start, length, id) after reordering
+    """
+    reordered = list(files)
+    for file_start, file_size, file_id in reversed(files):
+        best_size = 0
+        best_start = file_start
+        for size in range(file_size, len(free_heaps)):
+            if free_heaps[size] and free_heaps[size][0] < best_start:
+                best_start, best_size = free_heaps[size][0], size
+        if best_size == 0:
+            continue
+        heapq.heappop(free_heaps[best_size])
+        if best_size > file_size:
+            heapq.heappush(free_heaps[best_size-file_size], best_start+file_size)
+        reordered[file_id] = (best_start, file_size, file_id)
+    return reordered
+
+def calc_checksum_spans(files: List[Tuple[int, int, int]]) -> int:
+    return sum(file_id * series_sum(start, length) for start, length, file_id in files)
+
+def part1(filename: str) -> int:
+    return calc_checksum_stream(filename)
+
+def part2(filename: str) -> int:
+    files, free_heaps = create_spans(extract_data(filename))
+    return calc_checksum_spans(reorder_spans_blockwise(files, free_heaps))
+
 if __name__ == "__main__":
     input = extract_data("Day9/input.txt")
     # input = extract_data("Day9/test1.txt")
     # org_discmap = create_discmap(input)
     # input = extract_data("Day9/test2.txt")
-    org_discmap, file_blocks = create_discmap(input)
-    file_length = file_blocks.sum()
-    reordered_discmap = reorder_disc_elementwise(org_discmap, file_length)
-    checksum = calc_checksum_cont(reordered_discmap, file_length)
+    checksum = calc_checksum_stream("Day9/input.txt")
     print(checksum)
     # End of part 1
-    reordered_discmap = reorder_disc_blockwise(org_discmap, file_blocks)
-    checksum = calc_checksum(reordered_discmap)
+    files, free_heaps = create_spans(input)
+    reordered_files = reorder_spans_blockwise(files, free_heaps)
+    checksum = calc_checksum_spans(reordered_files)
     print(checksum)
\ No newline at end of file
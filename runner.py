@@ -0,0 +1,154 @@
+"""
+Run the solution of a day against any input file and report time, memory and an optional profile.
+
+Every day module DayN/dayN.py exposes part1(filename) and part2(filename) returning the answer.
+
+Usage (from the repository root):
+    python -m runner 7                              # both parts on Day7/input.txt
+    python -m runner 10 --part 2 --input Day10/test7.txt
+    python -m runner 6 --part 2 --repeat 10 --profile day6.prof
+"""
+import argparse
+import cProfile
+import importlib.util
+import os
+import re
+import sys
+import time
+import tracemalloc
+from types import ModuleType
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DAY_FILE_PATTERN = re.compile(r"day(\d+)\.py", re.IGNORECASE)
+
+class RunResult(NamedTuple):
+    answer: int
+    # Wall time of every timed run in seconds
+    times: List[float]
+    # Peak of the memory traced by tracemalloc in bytes or None if not measured
+    peak_memory: Optional[int]
+
+def discover_days(root: str = ROOT) -> Dict[int, str]:
+    """
+    Find the day modules in the DayN directories of root.
+
+    Returns:
+        Dict[int, str]: Path of the module of every day number
+    """
+    days = {}
+    for directory in os.listdir(root):
+        if not os.path.isdir(os.path.join(root, directory)):
+            continue
+        for filename in os.listdir(os.path.join(root, directory)):
+            match = DAY_FILE_PATTERN.fullmatch(filename)
+            if match and directory.lower() == f"day{match.group(1)}":
+                days[int(match.group(1))] = os.path.join(root, directory, filename)
+    return dict(sorted(days.items()))
+
+def load_day(path: str) -> ModuleType:
+    """Import a day module from its path without running its __main__ block."""
+    name = os.path.splitext(os.path.basename(path))[0].lower()
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    # Registered so worker processes can resolve the module's functions by name
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+def get_part(module: ModuleType, part: int) -> Callable[[str], int]:
+    solve = getattr(module, f"part{part}", None)
+    if solve is None:
+        raise ValueError(f"Module '{module.__name__}' has no part{part}(filename)")
+    return solve
+
+def run_part(solve: Callable[[str], int], filename: str, repeat: int = 1, trace_memory: bool = True, profile_path: Optional[str] = None) -> RunResult:
+    """
+    Run a part repeatedly and measure it.
+
+    Timed runs, the tracemalloc run and the profiled run are separate, so the overhead of
+    tracing and profiling does not distort the timings. tracemalloc only sees allocations of
+    this process, not memory-mapped files or worker processes.
+
+    Args:
+        solve (Callable[[str], int]): part1 or part2 of a day module
+        filename (str): Input file passed to solve
+        repeat (int): Number of timed runs
+        trace_memory (bool): Whether to measure the peak memory in an additional run
+        profile_path (Optional[str]): Where to dump the cProfile stats of an additional run
+
+    Returns:
+        RunResult: Answer of the last run, the times of all timed runs and the peak memory
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        answer = solve(filename)
+        times.append(time.perf_counter() - start)
+    peak_memory = None
+    if trace_memory:
+        tracemalloc.start()
+        try:
+            solve(filename)
+            peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    if profile_path:
+        profiler = cProfile.Profile()
+        profiler.runcall(solve, filename)
+        profiler.dump_stats(profile_path)
+    return RunResult(answer, times, peak_memory)
+
+def format_result(day: int, part: int, filename: str, result: RunResult) -> str:
+    best = min(result.times)
+    mean = sum(result.times) / len(result.times)
+    lines = [f"Day {day} part {part} ({filename}): {result.answer}"]
+    if len(result.times) > 1:
+        lines.append(f"  time: best {best*1000:.3f}ms, mean {mean*1000:.3f}ms over {len(result.times)} runs")
+    else:
+        lines.append(f"  time: {best*1000:.3f}ms")
+    if result.peak_memory is not None:
+        lines.append(f"  peak memory: {result.peak_memory / 2**20:.3f}MiB")
+    return "\n".join(lines)
+
+def profile_path_for_part(profile: Optional[str], part: int, num_parts: int) -> Optional[str]:
+    if not profile or num_parts == 1:
+        return profile
+    base, ext = os.path.splitext(profile)
+    return f"{base}.part{part}{ext}"
+
+def main(argv: Optional[List[str]] = None) -> int:
+    days = discover_days()
+    parser = argparse.ArgumentParser(prog="python -m runner", description="Run, time and profile a day's solution.")
+    parser.add_argument("day", type=int, nargs="?", help=f"Day to run, one of {list(days)}")
+    parser.add_argument("--part", type=int, choices=[1, 2], action="append", help="Part to run, may be given twice (default: both)")
+    parser.add_argument("--input", help="Input file (default: DayN/input.txt next to the module)")
+    parser.add_argument("--repeat", type=int, default=1, help="Number of timed runs")
+    parser.add_argument("--profile", help="Dump cProfile stats to this file, suffixed with .partN when running both parts")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc run")
+    parser.add_argument("--list", action="store_true", help="List the discovered days")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for day, path in days.items():
+            print(f"{day}: {os.path.relpath(path, ROOT)}")
+        return 0
+    if args.day is None:
+        parser.error("a day is required unless --list is given")
+    if args.day not in days:
+        parser.error(f"no module found for day {args.day}")
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    filename = args.input or os.path.relpath(os.path.join(os.path.dirname(days[args.day]), "input.txt"))
+    if not os.path.isfile(filename):
+        parser.error(f"input file '{filename}' not found")
+
+    module = load_day(days[args.day])
+    parts = sorted(set(args.part or [1, 2]))
+    for part in parts:
+        result = run_part(get_part(module, part), filename, args.repeat, not args.no_memory, profile_path_for_part(args.profile, part, len(parts)))
+        print(format_result(args.day, part, filename, result))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
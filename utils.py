@@ -1,4 +1,28 @@
-from typing import List
+import os
+import mmap
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
+from numpy.typing import NDArray
+
+class InputError(Exception):
+    """Base class for errors while reading puzzle input."""
+
+class InputFileNotFoundError(InputError, FileNotFoundError):
+    """The input file does not exist."""
+
+class InvalidNumberError(InputError, ValueError):
+    """A token of the input is not a valid integer."""
+
+class RaggedRowsError(InputError, ValueError):
+    """The rows of the input have different numbers of values but a dense array was requested."""
+
+class GridShapeError(InputError, ValueError):
+    """The lines of a character grid have different lengths."""
+
+# Largest number of digits that always fits into an int64
+MAX_INT_DIGITS: int = 18
+WHITESPACE: bytes = b" \t\r\n"
 
 def read_columns_from_file(filename: str, datatype: type = int) -> List[List[int]]:
     """
@@ -89,6 +113,223 @@ def read_file_to_string(filename: str) -> str:
         print(f"Error reading file: {str(e)}")
         return ""
 
+def read_file_to_bytes(filename: str) -> bytes:
+    """
+    Reads the whole file as bytes in one call.
+
+    Raises:
+        InputFileNotFoundError: If the file does not exist
+    """
+    try:
+        with open(filename, 'rb') as file:
+            return file.read()
+    except FileNotFoundError as e:
+        raise InputFileNotFoundError(f"File '{filename}' not found.") from e
+
+def parse_int_buffer(buffer: bytes, separators: bytes = WHITESPACE, first_line: int = 1) -> Tuple[NDArray[np.int64], NDArray[np.int64]]:
+    """
+    Parses all integers of a buffer at once without a Python loop over the tokens.
+
+    Tokens are the runs of bytes between separators. Every token has to be a decimal integer
+    with an optional leading '-'. The digits of all tokens are weighted by their power of ten
+    and summed per token with a single np.add.reduceat.
+
+    Args:
+        buffer (bytes): Raw file content
+        separators (bytes): Bytes separating the tokens, the newline always ends a row
+        first_line (int): Line number of the start of the buffer, only used for error messages
+
+    Returns:
+        Tuple[NDArray[np.int64], NDArray[np.int64]]: Values of all tokens and the row (line index within the buffer) of each token
+
+    Raises:
+        InvalidNumberError: If a token is not an integer or too long for int64
+    """
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    is_separator = np.zeros(256, dtype=bool)
+    is_separator[list(separators + b"\n")] = True
+    is_token = ~is_separator[data]
+    padded = np.concatenate(([False], is_token, [False]))
+    starts = np.flatnonzero(padded[1:-1] & ~padded[:-2])
+    ends = np.flatnonzero(padded[1:-1] & ~padded[2:])
+    negative = data[starts] == ord('-')
+    digit_starts = starts + negative
+    is_digit = (data >= ord('0')) & (data <= ord('9'))
+    invalid = is_token & ~is_digit
+    invalid[starts[negative]] = False
+    num_digits = ends - digit_starts + 1
+    if invalid.any() or (num_digits < 1).any() or (num_digits > MAX_INT_DIGITS).any():
+        position = int(np.flatnonzero(invalid)[0]) if invalid.any() else int(starts[(num_digits < 1) | (num_digits > MAX_INT_DIGITS)][0])
+        line_breaks = np.flatnonzero(data[:position] == ord('\n'))
+        column = position - (int(line_breaks[-1]) + 1 if line_breaks.size else 0) + 1
+        raise InvalidNumberError(f"Invalid integer in line {line_breaks.size + first_line} at column {column}")
+    if starts.size == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    # Number of line breaks before each token, only one index per line instead of per byte
+    rows = np.searchsorted(np.flatnonzero(data == ord('\n')), starts)
+    digit_positions = np.flatnonzero(is_digit & is_token)
+    # Power of ten of every digit is its distance to the end of its token
+    powers = np.repeat(ends, num_digits) - digit_positions
+    weighted = (data[digit_positions] - ord('0')).astype(np.int64) * 10**powers.astype(np.int64)
+    values = np.add.reduceat(weighted, np.cumsum(num_digits) - num_digits)
+    values[negative] *= -1
+    return values, rows
+
+def iter_int_rows(filename: str, separators: bytes = WHITESPACE, chunk_size: int = 1 << 18) -> Iterator[Tuple[NDArray[np.int64], NDArray[np.int64]]]:
+    """
+    Parses the file in chunks of whole lines so the temporary arrays of parse_int_buffer stay bounded.
+
+    Args:
+        filename (str): Path to the text file
+        separators (bytes): Bytes separating the values within a line
+        chunk_size (int): Number of bytes read at once, a longer line is read as a whole
+
+    Yields:
+        Tuple[NDArray[np.int64], NDArray[np.int64]]: Values of the non-empty lines of the chunk and offsets
+        so that row i of the chunk is values[offsets[i]:offsets[i+1]]
+
+    Raises:
+        InputFileNotFoundError: If the file does not exist
+        InvalidNumberError: If a value is not an integer
+    """
+    try:
+        file = open(filename, 'rb')
+    except FileNotFoundError as e:
+        raise InputFileNotFoundError(f"File '{filename}' not found.") from e
+    with file:
+        carry = b''
+        line = 1
+        while True:
+            block = file.read(chunk_size)
+            data = carry + block
+            if block:
+                cut = data.rfind(b'\n') + 1
+                data, carry = data[:cut], data[cut:]
+            if data:
+                values, rows = parse_int_buffer(data, separators, line)
+                line += data.count(b'\n')
+                if values.size:
+                    # Rows are non-decreasing so row changes mark the offsets and empty lines are skipped
+                    yield values, np.concatenate(([0], np.flatnonzero(np.diff(rows)) + 1, [values.size]))
+            if not block:
+                return
+
+def read_int_ragged(filename: str, separators: bytes = WHITESPACE, chunk_size: int = 1 << 18) -> Tuple[NDArray[np.int64], NDArray[np.int64]]:
+    """
+    Reads the integers of every non-empty line as one flat array plus row offsets.
+
+    The file is parsed chunk by chunk (see iter_int_rows) and the results are packed into
+    arrays while reading, so the peak memory is close to the size of the result.
+
+    Args:
+        filename (str): Path to the text file
+        separators (bytes): Bytes separating the values within a line
+        chunk_size (int): Number of bytes parsed at once
+
+    Returns:
+        Tuple[NDArray[np.int64], NDArray[np.int64]]: Values of all rows and offsets so that row i is values[offsets[i]:offsets[i+1]]
+
+    Raises:
+        InputFileNotFoundError: If the file does not exist
+        InvalidNumberError: If a value is not an integer
+    """
+    values = array('q')
+    offsets = array('q', [0])
+    for chunk_values, chunk_offsets in iter_int_rows(filename, separators, chunk_size):
+        offsets.frombytes((chunk_offsets[1:] + len(values)).tobytes())
+        values.frombytes(chunk_values.tobytes())
+    return np.frombuffer(values, dtype=np.int64), np.frombuffer(offsets, dtype=np.int64)
+
+def read_int_array(filename: str, separators: bytes = WHITESPACE) -> NDArray[np.int64]:
+    """
+    Reads a file with the same number of integers in every non-empty line as a dense 2D array.
+
+    Args:
+        filename (str): Path to the text file
+        separators (bytes): Bytes separating the values within a line
+
+    Returns:
+        NDArray[np.int64]: Array of shape (rows, columns), its transpose gives the columns
+
+    Raises:
+        InputFileNotFoundError: If the file does not exist
+        InvalidNumberError: If a value is not an integer
+        RaggedRowsError: If the lines have different numbers of values
+    """
+    values, offsets = read_int_ragged(filename, separators)
+    lengths = np.diff(offsets)
+    if lengths.size == 0:
+        return np.zeros((0, 0), dtype=np.int64)
+    if (lengths != lengths[0]).any():
+        row = int(np.flatnonzero(lengths != lengths[0])[0])
+        raise RaggedRowsError(f"Row {row} has {lengths[row]} values but row 0 has {lengths[0]}")
+    return values.reshape(lengths.size, int(lengths[0]))
+
+def make_lookup_table(mapping: Dict[str, int], default: int = 0, dtype: type = np.int64) -> NDArray:
+    """
+    Creates a table translating every byte value to a code, for use with load_char_grid.
+
+    Args:
+        mapping (Dict[str, int]): Code of every character of interest
+        default (int): Code of all other characters
+        dtype (type): Data type of the codes
+
+    Returns:
+        NDArray: Array of length 256 where entry b is the code of the character with byte value b
+    """
+    table = np.full(256, default, dtype=dtype)
+    for char, code in mapping.items():
+        table[ord(char)] = code
+    return table
+
+def load_char_grid(filename: str, lookup: Optional[NDArray] = None) -> NDArray:
+    """
+    Memory-maps a file of equally long lines and views it as a 2D array of the character codes.
+
+    Without a lookup table no bytes are copied: the array is a read-only view on the mapping
+    whose row stride skips the line break (LF or CRLF) at the end of every line. With a lookup
+    table every character is translated in one vectorized indexing step into a new array.
+
+    Args:
+        filename (str): Path to the text file
+        lookup (Optional[NDArray]): Table of length 256 as created by make_lookup_table
+
+    Returns:
+        NDArray: Array of shape (lines, line length), uint8 without lookup table
+
+    Raises:
+        InputFileNotFoundError: If the file does not exist
+        GridShapeError: If the lines have different lengths
+    """
+    try:
+        with open(filename, 'rb') as file:
+            size = os.fstat(file.fileno()).st_size
+            # The mapping stays alive as long as the array viewing it
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+    except FileNotFoundError as e:
+        raise InputFileNotFoundError(f"File '{filename}' not found.") from e
+    # Trailing line breaks do not belong to the grid
+    while size and buffer[size-1] in b"\r\n":
+        size -= 1
+    if size == 0:
+        grid = np.zeros((0, 0), dtype=np.uint8)
+        return grid if lookup is None else lookup[grid]
+    width = buffer.find(b"\n", 0, size)
+    if width == -1:
+        width, newline = size, 1
+    else:
+        newline = 2 if width and buffer[width-1] == ord("\r") else 1
+        width -= newline - 1
+    stride = width + newline
+    rows = (size + newline) // stride
+    if rows * stride - newline != size:
+        raise GridShapeError(f"File '{filename}' has lines of different lengths.")
+    grid = np.ndarray((rows, width), dtype=np.uint8, buffer=buffer, strides=(stride, 1))
+    line_ends = np.ndarray((rows-1,), dtype=np.uint8, buffer=buffer, offset=width+newline-1, strides=(stride,))
+    if (line_ends != ord("\n")).any():
+        raise GridShapeError(f"File '{filename}' has lines of different lengths.")
+    return grid if lookup is None else lookup[grid]
+
 if __name__ == "__main__":
     dat = read_rows_from_file("Day2/input.txt")
     print("Wait")
\ No newline at end of file